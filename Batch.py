@@ -0,0 +1,181 @@
+"""Runs many programs on headless Jarvis CPUs across a pool of worker
+processes.
+
+A job is a program (an .asm or .hack file), optionally with keyboard
+input and a cycle budget:
+
+    Job("Pong.asm", keys=[(500000, 130), (900000, 0)], max_cycles=5000000)
+
+Every distinct program is assembled once, here, and handed to each
+worker once as its packed instruction words.  Jobs only carry an index
+into those, and each worker keeps the compiled blocks of every program
+it has run.
+
+Usage: python3 Batch.py [-c cycles] [-k keyfile] [-r start:length ...] [-j] program ...
+"""
+
+import sys, time, json, argparse
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import Jarvis
+
+class Job(namedtuple("Job", ("program", "keys", "max_cycles"))):
+    """program is a filename, keys a list of (cycle, keycode) pairs for a
+    ScriptedKeyboard or the name of a file with one such pair per line,
+    and max_cycles the budget (None runs until the program halts)."""
+
+    def __new__(cls, program, keys=None, max_cycles=None):
+        return super(Job, cls).__new__(cls, program, keys, max_cycles)
+
+# what run_batch() returns for each job.  regions maps "start:length" to
+# the words of RAM there, reason is that of CPU.run() ("halt" when the
+# program reached a halt loop or Sys.halt) and error is None or a message.
+
+JobResult = namedtuple("JobResult", ("program", "cycles", "reason", "seconds", "regions", "error"))
+
+def read_keys(keys):
+    """Returns => list of (cycle, keycode) pairs from a list or a file of
+    "cycle keycode" lines (see Jarvis.read_keys)"""
+
+    if not isinstance(keys, str):
+        return list(keys or ())
+
+    return Jarvis.read_keys(keys)
+
+def parse_region(text):
+    """Parses a RAM region given as start:length
+
+    >>> parse_region("256:8"), parse_region("16384:8192")
+    ((256, 8), (16384, 8192))
+
+    Returns => (start, length)"""
+
+    start, length = text.split(":")
+
+    return (int(start), int(length))
+
+
+# state of a worker process, set up once by start_worker()
+
+programs = None
+blocks = None
+
+def start_worker(packed):
+
+    global programs, blocks
+
+    programs = packed
+    blocks = {}
+
+def run_job(index, keys, max_cycles, stops, regions, jit):
+    """Runs a job in a worker process on program number index.
+
+    Returns => (cycles, reason, seconds, regions)"""
+
+    started = time.time()
+
+    keyboard = Jarvis.ScriptedKeyboard(keys)
+    cpu = Jarvis.CPU(array("H", programs[index]), jit=jit, device=Jarvis.Headless(keyboard=keyboard), idle=True)
+
+    # compiled blocks only depend on the ROM
+
+    cpu.blocks = blocks.setdefault(index, {})
+
+    result = cpu.run(max_cycles=max_cycles, until_pc=stops)
+    reason = "halt" if result.reason == "until_pc" else result.reason
+
+    memory = dict(("%i:%i" % (start, length), cpu.RAM[start:start + length].tolist()) for start, length in regions)
+
+    return (result.cycles, reason, time.time() - started, memory)
+
+def run_batch(jobs, processes=None, regions=((0, 16),), jit=True):
+    """Runs jobs (Jobs or program filenames) in a pool of processes, one
+    per core by default, and collects the RAM regions ((start, length)
+    pairs) of each when it stops.
+
+    A job stops when its cycle budget runs out, or when the program
+    reaches an @END, 0;JMP loop (see Jarvis.find_halts) or Sys.halt.
+    Idle loops, waiting for a key or in Sys.wait, are skipped (see
+    Jarvis.CPU.fastforward()).
+
+    Returns => list of JobResult in the order of jobs"""
+
+    jobs = [job if isinstance(job, Job) else Job(job) for job in jobs]
+
+    # assemble every program once, a program that fails to is an error
+    # of each of its jobs
+
+    packed = []
+    index = {}
+    stops = {}
+    errors = {}
+
+    for job in jobs:
+        if job.program not in index and job.program not in errors:
+            try:
+                rom, symbols = Jarvis.read_program(job.program)
+            except Exception as e:
+                errors[job.program] = e
+                continue
+            index[job.program] = len(packed)
+            packed.append(rom.words.tobytes())
+            stops[job.program] = Jarvis.find_halts(rom).union([symbols["SYS.HALT"]] if "SYS.HALT" in symbols else [])
+
+    with ProcessPoolExecutor(processes, initializer=start_worker, initargs=(packed,)) as pool:
+
+        futures = []
+
+        for job in jobs:
+            try:
+                if job.program in errors:
+                    raise errors[job.program]
+                futures.append(pool.submit(run_job, index[job.program], read_keys(job.keys), job.max_cycles,
+                                           stops[job.program], list(regions), jit))
+            except Exception as e:
+                futures.append(e)
+
+        results = []
+
+        for job, future in zip(jobs, futures):
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                cycles, reason, seconds, memory = future.result()
+                results.append(JobResult(job.program, cycles, reason, seconds, memory, None))
+            except Exception as e:
+                results.append(JobResult(job.program, 0, "error", 0, {}, "%s: %s" % (type(e).__name__, e)))
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Run programs on headless CPUs, one process per core.")
+    parser.add_argument("programs", nargs="+", help=".asm or .hack files")
+    parser.add_argument("-c", "--cycles", type=int, default=10000000, help="cycle budget per program")
+    parser.add_argument("-k", "--keys", help="file of \"cycle keycode\" lines")
+    parser.add_argument("-r", "--region", type=parse_region, action="append", help="RAM region start:length to report")
+    parser.add_argument("-p", "--processes", type=int, help="worker processes, one per core by default")
+    parser.add_argument("-j", "--json", action="store_true", help="print the results as JSON")
+
+    args = parser.parse_args()
+
+    started = time.time()
+    results = run_batch([Job(program, args.keys, args.cycles) for program in args.programs],
+                        args.processes, args.region or [(0, 16)])
+
+    if args.json:
+        print(json.dumps([result._asdict() for result in results], indent=1))
+    else:
+        for result in results:
+            print("%-12s %12i %8.3fs  %s" % (result.reason, result.cycles, result.seconds, result.program))
+            for region, words in sorted(result.regions.items()):
+                print("    RAM[%s] %s" % (region, " ".join(map(str, words))))
+            if result.error:
+                print("    " + result.error)
+
+    print("%i programs in %.3fs" % (len(results), time.time() - started), file=sys.stderr)
+
+    sys.exit(1 if any(result.reason == "error" for result in results) else 0)
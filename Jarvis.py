@@ -2,11 +2,12 @@
 
 # This code is due for a major tuneup.
 
-from tkinter import Tk, Frame, PhotoImage, Label, BOTH
 from os import system
-from collections import namedtuple
+from collections import namedtuple, deque
+from array import array
+from multiprocessing.sharedctypes import RawArray
 
-import re, types, itertools, threading, time
+import re, os, sys, types, itertools, threading, multiprocessing, time, json, hashlib, importlib.util, py_compile, struct, zlib, gzip
 
 debug = True
 debugKBD = True
@@ -43,9 +44,101 @@ compTable = { "0"   : "101010",
               "A+D" : "000010",
               "D-A" : "010011",
               "A-D" : "000111",
+              "A&D" : "000000",
               "D&A" : "000000",
+              "A|D" : "010101",
               "D|A" : "010101" }
 
+# c bits => comp mnemonic
+
+compCodes = dict((int(bits, 2), comp) for comp, bits in compTable.items())
+
+# ALU expressions used both by CPU.ALU and by the block compiler.
+# Results wrap around to signed 16 bit words like the real ALU: adding
+# 32768, masking and subtracting 32768 again is two's complement overflow.
+
+aluSource = { "0"   : "0",
+              "1"   : "1",
+              "-1"  : "-1",
+              "D"   : "{d}",
+              "A"   : "{a}",
+              "!D"  : "~{d}",
+              "!A"  : "~{a}",
+              "-D"  : "(32768-{d}&65535)-32768",
+              "-A"  : "(32768-{a}&65535)-32768",
+              "D+1" : "({d}+32769&65535)-32768",
+              "A+1" : "({a}+32769&65535)-32768",
+              "D-1" : "({d}+32767&65535)-32768",
+              "A-1" : "({a}+32767&65535)-32768",
+              "D+A" : "({a}+{d}+32768&65535)-32768",
+              "A+D" : "({a}+{d}+32768&65535)-32768",
+              "D-A" : "({d}-{a}+32768&65535)-32768",
+              "A-D" : "({a}-{d}+32768&65535)-32768",
+              "D&A" : "{a}&{d}",
+              "A&D" : "{a}&{d}",
+              "D|A" : "{a}|{d}",
+              "A|D" : "{a}|{d}" }
+
+# what CPU.run() returns
+
+RunResult = namedtuple("RunResult", ("cycles", "reason", "PC", "seconds"))
+
+# what stopped the debug loop (see CPU.breakpoint() and CPU.watch()).
+# address, old and new are None for breakpoints.
+
+DebugEvent = namedtuple("DebugEvent", ("reason", "PC", "address", "old", "new"))
+
+# header of a CPU.snapshot(): magic, PC, A, D, zr, ng and instructions
+# retired.  RAM follows as ramSize little endian words.
+
+snapshotHeader = struct.Struct("<4sHhhBBQ")
+
+# RAM is memory, the screen map at 16384 and an I/O page of 16 words from
+# 24576: the keyboard word, then registers the CPU sets every clockPeriod
+# instructions (see CPU.clock()), milliseconds and instructions retired as
+# a low and a high word.  Programs can only read them.  Devices without
+# live input count milliseconds of simulatedHz instructions, so runs
+# repeat exactly.  The registers of the optional DMA controller follow
+# at dmaRegister (see DMA).
+
+ramSize = 24592
+timerRegister = 24577
+cyclesRegister = 24578
+dmaRegister = 24580
+clockPeriod = 10000
+simulatedHz = 1000000
+
+# a record of CPU.trace(): PC, then A and D after the instruction ran,
+# and the RAM address it wrote (noWrite if none) and the value written.
+# A trace file is a traceHeader, magic, number of records and the cycle
+# of the first, followed by the records oldest first.
+
+traceRecord = struct.Struct("<HhhHh")
+traceHeader = struct.Struct("<4sIQ")
+noWrite = 0xFFFF
+
+# RAM regions CPU.meter() adds traffic up by, where they start, and the
+# region of every address
+
+regionNames = ("registers", "statics", "stack", "heap", "screen", "io")
+regionStarts = (0, 16, 256, 2048, 16384, 24576)
+
+regionTable = bytes(sum(address >= start for start in regionStarts) - 1 for address in range(ramSize))
+
+# a frame is the bytes of screen memory, 32 little endian words a row and
+# the leftmost pixel of a word in its lowest bit.  Image formats put the
+# leftmost pixel of a byte in its highest bit, PNG with 0 for black.
+
+reversedBits = bytes(int("{:08b}".format(byte)[::-1], 2) for byte in range(256))
+invertedBits = bytes(255 - byte for byte in reversedBits)
+
+# records of a frame stream (see StreamScreen): a frame is its cycle and
+# number of runs, a run the word it starts at and its number of words,
+# followed by the words
+
+frameRecord = struct.Struct("<QH")
+frameRun = struct.Struct("<HH")
+
 jumpTable = { "JGT" : "001",
               "JEQ" : "010",
               "JGE" : "011",
@@ -78,7 +171,10 @@ def make_symboltable(program):
                     "THIS"   : 3,
                     "THAT"   : 4,
                     "SCREEN" : 16384,    # 0x4000
-                    "KBD"    : 24576 }   # 0x6000
+                    "KBD"    : 24576,    # 0x6000
+                    "TIMER"  : 24577,
+                    "CYCLES" : 24578,
+                    "DMA"    : 24580 }
 
     for i in range(16):
         symbolTable["R" + str(i)] = i
@@ -100,6 +196,29 @@ def make_symboltable(program):
 
     return symbolTable
 
+def make_variabletable(program, nextRAM = 16):
+    """Allocates RAM to the variables of a program, the symbols that are
+    neither predefined nor labels, in order of first use as parse() does.
+
+    Returns => dict of variable name => RAM address"""
+
+    symbols = make_symboltable(program)
+    variables = {}
+
+    for line in program:
+
+        line = clean(line)
+
+        if line and line.startswith("@"):
+
+            val = line[1:].upper()
+
+            if not val.isdecimal() and val not in symbols and val not in variables:
+                variables[val] = nextRAM
+                nextRAM += 1
+
+    return variables
+
 def parse(program, nextRAM = 16, maxRAM = 16383, A_bits = 15):
     """Builds a symbol table and parses a full program before assembly."""
 
@@ -316,6 +435,57 @@ def bin2int(X):
 
     return sum(map(lambda x,y: int(x)*y, reversed(X), map(lambda i: 2**i, range(len(X)))))
 
+def decode(program):
+    """Assembles a parsed program into a ROM for the CPU.
+
+    Accepts the commands yielded by parse(), packed instruction words
+    or an existing ROM
+
+    Returns => ROM"""
+
+    if isinstance(program, ROM):
+        return program
+
+    rom = ROM()
+
+    for command in program:
+
+        if isinstance(command, int):
+            word = command
+            rom.lines.append(0)
+        else:
+            word = int(assemble(command), 2)
+            rom.lines.append(command.get("LINE", 0))
+
+        rom.words.append(word)
+
+        if word & 0x8000:
+            rom.abit.append((word >> 12) & 1)
+            rom.comp.append((word >> 6) & 0x3f)
+            rom.dest.append((word >> 3) & 7)
+            rom.jump.append(word & 7)
+        else:
+            rom.abit.append(0)
+            rom.comp.append(0)
+            rom.dest.append(0)
+            rom.jump.append(0)
+
+    return rom
+
+def read_program(filename):
+    """Reads a program from an .asm file, or a .hack file of binary
+    words.
+
+    Returns => (ROM, symbols), symbols is {} for .hack files"""
+
+    with open(filename) as inputfile:
+        lines = inputfile.readlines()
+
+    if filename.endswith(".hack"):
+        return decode(int(line, 2) for line in lines if line.strip()), {}
+
+    return decode(parse(lines)), make_symboltable(lines)
+
 
 ####### Error Classes #########
 
@@ -362,347 +532,3208 @@ class BitstringError(Error):
 class IndexOutOfBoundsError(Error):
     pass
 
+class CallGraphError(Error):
+    """Exception raised when a program does not use the VM call convention."""
+    pass
 
-class StoppableThread(threading.Thread):
-    """Thread class with a stop() method. The thread itself has to check
-    regularly for the stopped() condition."""
+class SnapshotError(Error):
+    """Exception raised for a snapshot that cannot be restored."""
+    pass
 
-    def __init__(self, *args, **kwargs):
-        super(StoppableThread, self).__init__(*args, **kwargs)
-        self._stopflag = threading.Event()
 
-    def stop(self):
-        self._stopflag.set()
+# conditions on the ALU result r, indexed by the jump bits
 
-    def stopped(self):
-        return self._stopflag.isSet()
+jumpSource = ( None, "r > 0", "r == 0", "r >= 0", "r < 0", "r != 0", "r <= 0", None )
 
+def find_leaders(rom):
+    """Finds the addresses where a basic block may begin: the first
+    instruction, every instruction following a jump and every address
+    loaded into A by an A_COMMAND (a possible computed jump target).
 
+    Returns => set of ROM addresses"""
 
+    leaders = set([0])
 
-class IO:
-    
-    def __init__(self, thread):
-         
-       # set up screen, width = 512, height = 256
+    for pc in range(len(rom)):
 
-        self.mythread = thread
-        self.screen = Tk()
-        self.screen.title("Jarvis Simulator")
-        self.screen.geometry("512x256+1600+500")
-        self.screen.wm_maxsize(width=512, height=256)
-        self.screen.wm_minsize(width=512, height=256)
-        self.screen.wm_resizable(width=False, height=False)
+        word = rom.words[pc]
 
-        self.image = PhotoImage(width = 512, height = 256)
+        if word < 0x8000:
+            if word < len(rom):
+                leaders.add(word)
 
-        self.label = Label(self.screen, image=self.image)
+        elif rom.jump[pc]:
+            leaders.add(pc + 1)
 
-        self.label.grid()
+    return leaders
 
-        # set up keyboard
+def find_halts(rom):
+    """Finds the loops a program halts in: an A_COMMAND that loads its
+    own address followed by an unconditional jump, as in
 
-        for c in self.Keycodes.keys():
-            exec("self.screen.bind(\"<%s>\", self.%s)" % (c, c))
+        (END)
+        @END
+        0;JMP
 
-        self.screen.bind("<Any-KeyPress>", self.KeyPressed)
-        self.screen.bind("<Any-KeyRelease>", self.KeyReleased)
+    Returns => frozenset of the addresses of the A_COMMANDs"""
 
-        system("xset r off")
-        self.screen.protocol("WM_DELETE_WINDOW", self.delete_callback)
+    return frozenset(pc for pc in range(len(rom) - 1)
+                     if rom.words[pc] == pc and rom.words[pc + 1] & 0x8000
+                     and rom.jump[pc + 1] == 7 and rom.dest[pc + 1] == 0)
 
-    def delete_callback(self):
-        system("xset r on")
-        self.mythread.stop()
-        self.screen.destroy()
-        
-        
-        
-    KBD = 0
-    
-    Keycodes = { "Return"     : 128,
-                 "BackSpace"  : 129,
-                 "Left"       : 130,
-                 "Up"         : 131,
-                 "Right"      : 132,
-                 "Down"       : 133,
-                 "Home"       : 134,
-                 "End"        : 135,
-                 "Prior"      : 136,
-                 "Next"       : 137,
-                 "Insert"     : 138,
-                 "Delete"     : 139,
-                 "Escape"     : 140 }
+def block_source(rom, start, end, name, exits=None, dma=False):
+    """Generates the source of a python function that executes
+    rom[start:end] with A, D and RAM in local variables.
 
-    for i in range(1,13):
-        k = { "F" + str(i) : 140+i }
-        Keycodes.update(k)
+    The function is called as name(A, D, RAM) and returns
+    (PC, A, D, result of the last C_COMMAND or None, instructions executed).
+    A conditional jump leaves the function early when it is taken and an
+    unconditional jump ends it.  name.size is set to end - start, the most
+    instructions one call can execute.
 
-    for key in Keycodes.keys():
-        code = Keycodes[key]
+    Values loaded by A_COMMANDs are folded into the code that uses them
+    and A is only written back when it is actually computed.
 
-        exec("""def %s(self, event):
-                    self.KBD = %s
-                    if debugKBD:
-                        print(%s)""" % (key, code, code))
+    With a list of exits the function also counts for CPU.meter().  Each
+    way out of the function is appended to exits as (start, instructions
+    executed, address of the jump taken or None, ((TRAFFIC index, count),
+    ...) of the accesses to addresses folded in from A_COMMANDs), and
+    counted in the global EXITS at its index there.  Accesses through
+    computed addresses are counted in TRAFFIC as they happen: reads of
+    address at [address], writes at [ramSize + address] and screen writes
+    that change the word at [2 * ramSize].
 
-    def KeyPressed(self, event):
+    With dma set every write to the go register of the DMA controller
+    calls the global DMA(RAM), see DMA.
 
-        if event.char:
-            self.KBD = ord(event.char)
-            if debugKBD:
-                print(str(ord(event.char)))
+    Returns => string"""
 
-    def KeyReleased(self, event):
+    code = ["def %s(A, D, RAM):" % name]
 
-        self.KBD = 0
+    a = "A"         # expression for the current value of A
+    r = "None"      # name of the last ALU result
 
-        if debugKBD:
-            print("Key Released.\n")
+    meter = exits is not None
+    traffic = {}    # TRAFFIC index => accesses to known addresses so far
 
+    def exit(pc, count, target=None, taken=None):
 
-    def drawFill(self, color):
+        statement = "return (%s, %s, D, %s, %i)" % (target or str(pc), a, r, count)
 
-        horizontal_line = "{" + " ".join([color]*self.image.width()) + "}"
-        self.image.put(" ".join([horizontal_line] * self.image.height()))
+        if not meter:
+            return statement
 
-    def drawPoint(self, x, y, color):
+        exits.append((start, count, taken, tuple(sorted(traffic.items()))))
 
-        #~ print("Drawing %s point at (%i, %i)" % (color, x, y))
+        return "EXITS[%i] += 1; %s" % (len(exits) - 1, statement)
 
-        self.image.put(color, (x, y))
+    def region(a):
+        if a.isdigit() and int(a) < len(regionTable):
+            return regionTable[int(a)]
 
-    def drawmem(self, location, value):
+    for pc in range(start, end):
 
-        (y, x) = divmod(location,32)
+        word = rom.words[pc]
+        count = pc - start + 1
 
-        x = x * 16
+        if word < 0x8000:
+            a = str(word)
+            continue
 
-        memword = binary(value, bits=16)
-        
-        for i in range(0, 16):
-            if memword[15-i] == '1':
-                self.drawPoint(x+i, y, "green")
+        if rom.abit[pc]:
+            x = "RAM[%s]" % a
+            if meter:
+                if region(a) is None:
+                    code.append("    TRAFFIC[%s] += 1" % a)
+                else:
+                    traffic[int(a)] = traffic.get(int(a), 0) + 1
+        else:
+            x = a
+
+        expr = aluSource[compCodes[rom.comp[pc]]].format(a=x, d="D")
+        r = "r"
+
+        dest = rom.dest[pc]
+        jump = rom.jump[pc]
+        target = a
+
+        if jump and dest & 4 and a == "A":
+            code.append("    T = A")
+            target = "T"
+
+        if dest & 1 and meter:
+
+            # count screen words the write changes before writing
+
+            code.append("    r = %s" % expr)
+
+            if region(a) is None:
+                code.append("    TRAFFIC[%i + %s] += 1" % (ramSize, a))
+                code.append("    if %s > 16383 and RAM[%s] != r and %s < 24576: TRAFFIC[%i] += 1" % (a, a, a, 2 * ramSize))
             else:
-                self.drawPoint(x+i, y, "black")
-                
-                
+                traffic[ramSize + int(a)] = traffic.get(ramSize + int(a), 0) + 1
+                if region(a) == 4:
+                    code.append("    if RAM[%s] != r: TRAFFIC[%i] += 1" % (a, 2 * ramSize))
 
+            code.append("    RAM[%s] = r" % a)
+            expr = "r"
 
+        elif dest & 1:
+            code.append("    RAM[%s] = r = %s" % (a, expr))
+            expr = "r"
 
+        if dest & 1 and dma:
+            if not a.isdigit():
+                code.append("    if %s == %i: DMA(RAM)" % (a, dmaRegister + 4))
+            elif int(a) == dmaRegister + 4:
+                code.append("    DMA(RAM)")
 
-class CPU:
+        # A, D and r all receive the result in one chained assignment
 
-    ALU = { "0"   : lambda a,d: 0,
-            "1"   : lambda a,d: 1,
-            "-1"  : lambda a,d: -1,
-            "D"   : lambda a,d: d,
-            "A"   : lambda a,d: a,
-            "!D"  : lambda a,d: ~d,
-            "!A"  : lambda a,d: ~a,
-            "-D"  : lambda a,d: -d,
-            "-A"  : lambda a,d: -a,
-            "D+1" : lambda a,d: d+1,
-            "A+1" : lambda a,d: a+1,
-            "D-1" : lambda a,d: d-1,
-            "A-1" : lambda a,d: a-1,
-            "D+A" : lambda a,d: a+d,
-            "A+D" : lambda a,d: a+d,
-            "D-A" : lambda a,d: d-a,
-            "A-D" : lambda a,d: a-d,
-            "D&A" : lambda a,d: a&d,
-            "A&D" : lambda a,d: a&d,
-            "D|A" : lambda a,d: a|d,
-            "A|D" : lambda a,d: a|d }
-
-
-
-
-    def __init__(self, program=None):
+        targets = [reg for bit, reg in ((4, "A"), (2, "D")) if dest & bit]
 
-        self.mythread = StoppableThread(target = self._run)
-        self.IO = IO(self.mythread)
-        
-        # Load the passed program into the ROM and reset the CPU
-        
-        self.reset()
-        
-        if program:
-            self.ROM = program
+        if expr != "r":
+            code.append("    " + " = ".join(targets + ["r", expr]))
+        elif targets:
+            code.append("    " + " = ".join(targets + ["r"]))
 
-    def __str__(self):
-        return ({"PC":self.PC, "A":self.A, "D":self.D, "zr":self.zr, "ng": self.ng})
+        if dest & 4:
+            a = "A"
 
-    def reset(self):
-        # Initialize memory and registers
+        if jump == 7:
+            code.append("    " + exit(pc + 1, count, target))
+            break
 
-        self.PC = 0
-        self.zr = 0
-        self.ng = 0
-        self.A = 0
-        self.D = 0
-        self.KBD = 0
-        
-        self.RAM = []
+        if jump:
+            code.append("    if %s: %s" % (jumpSource[jump], exit(pc + 1, count, target, pc)))
 
-        for i in range(24576):
-            self.RAM.append(0)
+    else:
+        code.append("    " + exit(end, end - start))
 
-        # reset screen
+    code.append("%s.size = %i" % (name, end - start))
 
-        self.IO.drawFill("black")
+    return "\n".join(code)
 
-    def start(self):
-                
-        self.ticks = float(time.time())
-        self.hz = 0
-        self.iterations = 1
+def recompile_source(program, dma=False):
+    """Translates a whole assembly program into the source of a python
+    module.
 
-        self.mythread.start()
+    The module has one function per label region (see block_source),
+    split again after every unconditional jump, and
 
-    def _run(self):
+        ENTRY   dispatch table of region functions keyed by address
+        WORDS   the packed instruction words, for decode()
+        DMA     with dma, where CPU.load() puts the go() of its DMA
 
+    Returns => string"""
 
-        while self.mythread.stopped() == False:
+    program = list(program)
+    symbols = make_symboltable(program)
+    predefined = make_symboltable([])
 
-            self.step()
+    rom = decode(parse(program))
 
-            self.hz = (self.iterations / (time.time() - self.ticks))
+    labels = {}
 
+    for name in symbols:
+        if name not in predefined:
+            labels.setdefault(symbols[name], name)
 
-            #~ print("Iterations: %i Hz: %i" % (self.iterations, self.hz))
+    starts = set([0])
+    starts.update(pc for pc in labels if pc < len(rom))
+    starts.update(pc + 1 for pc in range(len(rom) - 1) if rom.words[pc] & 0x8000 and rom.jump[pc] == 7)
+    starts = sorted(starts)
 
-            self.iterations += 1
+    code = [ "# Recompiled by Jarvis.py, do not edit.",
+             ""]
 
- 
-    def step(self):
+    for start, end in zip(starts, starts[1:] + [len(rom)]):
 
-        command = self.ROM[self.PC]
+        if start in labels:
+            code.append("# (%s)" % labels[start])
 
+        code.append(block_source(rom, start, end, "L%i" % start, dma=dma))
+        code.append("")
 
-        if command["TYPE"] == "A_COMMAND":
+    code.append("ENTRY = { " + ",\n          ".join("%i : L%i" % (pc, pc) for pc in starts) + " }")
+    code.append("")
+    code.append("WORDS = ( " + ",\n          ".join(map(str, rom.words)) + " )")
+    code.append("")
 
-            self.A = command["VAL"]
-            self.PC += 1
+    if dma:
+        code.append("DMA = None")
+        code.append("")
 
-        elif command["TYPE"] == "C_COMMAND":
+    return "\n".join(code)
 
-            dest = command["VAL"]["DEST"]
-            comp = command["VAL"]["COMP"]
-            jump = command["VAL"]["JUMP"]
+def recompile(program, cachedir="__jarviscache__", dma=False):
+    """Recompiles an assembly program into a python module and imports it,
+    for a CPU with a DMA controller if dma is set.
 
+    The module is written to cachedir, named after a hash of the program
+    and of this simulator, so later runs with the same program skip
+    parsing and compiling altogether.
 
-            if 'M' in comp:
+    Returns => module (see recompile_source)"""
 
-                if self.A == 24576:
-                    result = self.ALU[comp.replace("M", "A")](self.IO.KBD, self.D)
-                else:
+    program = [line.rstrip("\n") for line in program]
 
-                    result = self.ALU[comp.replace("M", "A")](self.RAM[self.A], self.D)
+    key = hashlib.sha1()
+    key.update(open(__file__, "rb").read())
+    key.update("\n".join(program).encode())
+    key.update(b"dma" if dma else b"")
 
-            else:
-                result = self.ALU[comp](self.A, self.D)
+    name = "rom_" + key.hexdigest()
+    filename = os.path.join(cachedir, name + ".py")
 
+    if not os.path.exists(filename):
 
-            self.zr = 0
-            self.ng = 0
+        os.makedirs(cachedir, exist_ok=True)
 
-            if result == 0:
-                self.zr = 1
-            elif result < 0:
-                self.ng = 1
+        with open(filename + ".tmp", "wt") as outputfile:
+            outputfile.write(recompile_source(program, dma))
 
-            if jump == "":
-                self.PC += 1
-            else:
+        os.replace(filename + ".tmp", filename)
 
-                if jump == "JGT":
-                    if result > 0:
-                        self.PC = self.A
-                    else:
-                        self.PC += 1
-                elif jump == "JEQ":
-                    if result == 0:
-                        self.PC = self.A
-                    else:
-                        self.PC += 1
-                elif jump == "JGE":
-                    if result >= 0:
-                        self.PC = self.A
-                    else:
-                        self.PC += 1
-                elif jump == "JLT":
-                    if result < 0:
-                        self.PC = self.A
-                    else:
-                        self.PC += 1
-                elif jump == "JNE":
-                    if result != 0:
-                        self.PC = self.A
-                    else:
-                        self.PC += 1
-                elif jump == "JLE":
-                    if result <= 0:
-                        self.PC = self.A
-                    else:
-                        self.PC += 1
-                elif jump == "JMP":
-                    self.PC = self.A
-                else:
-                    self.PC += 1
+        # write the bytecode explicitly, later runs should never have to
+        # compile the module again (even with PYTHONDONTWRITEBYTECODE)
 
+        py_compile.compile(filename, doraise=True)
 
-            if 'M' in dest:
+    spec = importlib.util.spec_from_file_location(name, filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
 
-                if self.A >= 16384 and self.A < 24576:
+    return module
 
-                    if result != self.RAM[self.A]:
-                        self.IO.drawmem(location = self.A - 16384, value = result)
-                        
-            
-                self.RAM[self.A] = result
+class ROM:
+    """Predecoded program memory.
 
-            if 'A' in dest:
-                self.A = result
+    Every instruction is kept as its packed 16 bit word, and the fields
+    of C_COMMANDs are split out into parallel arrays so the CPU only has
+    to index and compare integers on each cycle:
 
-            if 'D' in dest:
-                self.D = result
+        abit    1 if comp reads M instead of A
+        comp    the six c bits, an index into CPU.OPS
+        dest    d1 d2 d3 (A = 4, D = 2, M = 1)
+        jump    j1 j2 j3 (lt = 4, eq = 2, gt = 1)
 
+    lines holds the source line of each instruction for error messages."""
 
+    __slots__ = ("words", "abit", "comp", "dest", "jump", "lines")
 
+    def __init__(self):
+        self.words = array("H")
+        self.abit = array("B")
+        self.comp = array("B")
+        self.dest = array("B")
+        self.jump = array("B")
+        self.lines = array("L")
 
+    def __len__(self):
+        return len(self.words)
 
+    def __getitem__(self, pc):
+        return disassemble(binary(self.words[pc], bits=16))
 
-t = []
 
-#~  Uncomment this line to play a very slow version of pong
-inputfile = "Pong.asm"
+# labels the book's VM translators generate for return addresses, the
+# end of the shared comparison routines and the loop that pushes the
+# locals of a function (LOOP_ followed by the function name)
 
-#~ inputfile = "OS/OS.asm"
+generatedLabel = re.compile(r"^(RET_ADDRESS_(CALL|EQ|GT|LT)\d+|END_(EQ|GT|LT)|LOOP_.*)$")
 
+class Profile:
+    """Executions per ROM address, aggregated by the nearest preceding
+    label.
 
+    Labels the VM translator generates inside a function (Foo.bar.call.0,
+    Foo.bar.WHILE_EXP.1, LT.TRUE) are folded into the label they extend
+    (Foo.bar, LT), so every VM function, and each of the shared
+    (call)/(return)/(lt)/(gt)/(eq) routines, gets one line.  So are the
+    Foo.bar$WHILE_EXP0 labels of the book's translators, and their
+    generatedLabel ones start no line at all.
 
+    >>> rom, symbols = read_program("Pong.asm")
+    >>> cpu = CPU(rom)
+    >>> cpu.profile()
+    >>> cycles = cpu.run(max_cycles=1000000).cycles
+    >>> [label for label, cycles in cpu.report(symbols).top(4)]
+    ['MEMORY.ALLOC', '(start)', 'MATH.MULTIPLY', 'OUTPUT.CREATE']
 
-for i in open(inputfile).readlines():
-    t.append(i)
+    The book's shared call, return and comparison routines have no
+    labels of their own and count towards (start).
+    """
 
-rom = []
+    def __init__(self, counts, symbols):
 
-for i in parse(t):
-    rom.append(i)
-    
-#~ inputfile.close()
+        self.counts = counts
+
+        predefined = make_symboltable([])
+        labels = dict((name, symbols[name]) for name in symbols if name not in predefined)
+
+        # address => label that starts there
+
+        starts = {}
+
+        for name in sorted(labels, key=len):
+
+            if generatedLabel.match(name):
+                continue
+
+            owner = name
+            base = name.split("$")[0]
+            prefixes = [base.rsplit(".", i)[0] for i in range(name == base, base.count(".") + 1)]
+
+            for prefix in prefixes:
+                if prefix in labels:
+                    owner = prefix
+                    break
+
+            starts.setdefault(labels[name], owner)
+
+        self.labels = {}
+        owner = "(start)"
+
+        for pc in range(len(counts)):
+            owner = starts.get(pc, owner)
+            self.labels[owner] = self.labels.get(owner, 0) + counts[pc]
+
+    def total(self):
+        return sum(self.counts)
+
+    def top(self, n=None):
+        """Returns => [(label, cycles), ...] busiest first"""
+
+        ranked = sorted(((label, cycles) for label, cycles in self.labels.items() if cycles),
+                        key=lambda item: -item[1])
+
+        return ranked[:n] if n else ranked
+
+    def text(self, n=30):
+
+        total = self.total() or 1
+
+        lines = ["%12s %7s  %s" % ("cycles", "%", "label")]
+
+        for label, cycles in self.top(n):
+            lines.append("%12i %6.2f%%  %s" % (cycles, 100.0 * cycles / total, label))
+
+        return "\n".join(lines)
+
+    def json(self):
+
+        return json.dumps({ "total"     : self.total(),
+                            "labels"    : dict(self.top()),
+                            "addresses" : dict((pc, count) for pc, count in enumerate(self.counts) if count) })
+
+
+class TraceBuffer:
+    """The last length instructions run by a CPU in trace mode, as
+    traceRecords in a ring buffer allocated once (see CPU.trace()).
+
+    count is the number of instructions traced in all and cycle the
+    cycle tracing started at.  dump() writes the records still held to
+    filename, read_trace() reads them back."""
+
+    def __init__(self, length, cycle=0, filename=None):
+        self.length = length
+        self.buffer = bytearray(length * traceRecord.size)
+        self.count = 0
+        self.cycle = cycle
+        self.filename = filename
+
+    def records(self):
+        """Returns => bytes of the records held, oldest first"""
+
+        size = traceRecord.size
+        split = self.count % self.length * size
+
+        if self.count < self.length:
+            return bytes(self.buffer[:split])
+
+        return bytes(self.buffer[split:] + self.buffer[:split])
+
+    def dump(self, filename=None):
+        """Writes the records held to filename (self.filename by default)"""
+
+        filename = filename or self.filename
+        held = min(self.count, self.length)
+
+        with open(filename, "wb") as outputfile:
+            outputfile.write(traceHeader.pack(b"TRCE", held, self.cycle + self.count - held))
+            outputfile.write(self.records())
+
+def read_trace(filename):
+    """Reads a trace written by TraceBuffer.dump().
+
+    Returns => (cycle of the first record, list of (PC, A, D, address,
+               value) records)"""
+
+    with open(filename, "rb") as inputfile:
+        data = inputfile.read()
+
+    magic, count, cycle = traceHeader.unpack_from(data)
+
+    if magic != b"TRCE" or len(data) != traceHeader.size + count * traceRecord.size:
+        raise Error("%s is not a trace" % filename)
+
+    return cycle, list(traceRecord.iter_unpack(data[traceHeader.size:]))
+
+
+class Metrics:
+    """Instruction mix and RAM traffic counted by CPU.meter():
+
+        instructions    executed in all
+        a, c            A_COMMANDs and C_COMMANDs executed
+        comps           C_COMMANDs by comp mnemonic ("D+M", "0", ...)
+        jumps           jumping C_COMMANDs by condition ("JGT", ...), as
+                        [taken, not taken]
+        reads, writes   RAM accesses by region (see regionNames)
+        changed         screen writes that changed the word"""
+
+    def __init__(self, rom, counts, taken, traffic):
+
+        names = dict((int(bits, 2), name) for name, bits in jumpTable.items())
+
+        self.instructions = sum(counts)
+        self.a = self.c = 0
+        self.comps = {}
+        self.jumps = dict((name, [0, 0]) for name in jumpTable)
+
+        for pc, count in enumerate(counts):
+
+            if not count:
+                continue
+
+            if rom.words[pc] < 0x8000:
+                self.a += count
+                continue
+
+            self.c += count
+
+            comp = compCodes[rom.comp[pc]]
+            if rom.abit[pc]:
+                comp = comp.replace("A", "M")
+
+            self.comps[comp] = self.comps.get(comp, 0) + count
+
+            jump = rom.jump[pc]
+
+            if jump == 7:
+                self.jumps["JMP"][0] += count
+            elif jump:
+                self.jumps[names[jump]][0] += taken[pc]
+                self.jumps[names[jump]][1] += count - taken[pc]
+
+        # traffic counts accesses by address (see block_source)
+
+        self.reads = dict((name, 0) for name in regionNames)
+        self.writes = dict((name, 0) for name in regionNames)
+
+        for address in range(ramSize):
+            if traffic[address]:
+                self.reads[regionNames[regionTable[address]]] += traffic[address]
+            if traffic[ramSize + address]:
+                self.writes[regionNames[regionTable[address]]] += traffic[ramSize + address]
+
+        self.changed = traffic[2 * ramSize]
+
+    def text(self):
+
+        total = self.instructions or 1
+
+        lines = ["%12i instructions, %i A (%.1f%%) and %i C (%.1f%%)" %
+                 (self.instructions, self.a, 100.0 * self.a / total, self.c, 100.0 * self.c / total)]
+
+        for comp, count in sorted(self.comps.items(), key=lambda item: -item[1]):
+            lines.append("%12i %6.2f%%  %s" % (count, 100.0 * count / total, comp))
+
+        for name in sorted(self.jumps):
+            taken, untaken = self.jumps[name]
+            if taken or untaken:
+                lines.append("%12i taken, %i not  %s" % (taken, untaken, name))
+
+        for name in regionNames:
+            lines.append("%12i reads, %i writes  %s" % (self.reads[name], self.writes[name], name))
+
+        lines.append("%12i screen writes changed the word" % self.changed)
+
+        return "\n".join(lines)
+
+    def json(self):
+
+        return json.dumps({ "instructions" : self.instructions,
+                            "a"            : self.a,
+                            "c"            : self.c,
+                            "comps"        : self.comps,
+                            "jumps"        : self.jumps,
+                            "reads"        : self.reads,
+                            "writes"       : self.writes,
+                            "changed"      : self.changed })
+
+
+class CallGraph:
+    """Shadow call stack for programs built by VMTranslator.
+
+    Every VM call jumps through the shared (call) routine with the
+    function address in R15 and the return address in D, and every
+    return jumps through (return).  CPU.callgraph() hooks both entry
+    points, and from those events this keeps
+
+        inclusive   cycles => function, including its callees (counted
+                    once for recursive functions)
+        exclusive   cycles => function, excluding its callees
+        stacks      cycles => call stack, as a tuple of function names
+
+    The cycles of the (call) routine itself count towards the callee,
+    and those of (return) towards the caller.  Counting starts at cycle,
+    the cycles run before it are nobody's."""
+
+    def __init__(self, symbols, cycle=0):
+
+        if "CALL" not in symbols or "RETURN" not in symbols:
+            raise CallGraphError("program has no (call) and (return) routines")
+
+        self.call = symbols["CALL"]
+        self.ret = symbols["RETURN"]
+
+        predefined = make_symboltable([])
+
+        self.names = {}
+
+        for name in sorted(symbols, key=len):
+            if name not in predefined:
+                self.names.setdefault(symbols[name], name)
+
+        self.inclusive = {}
+        self.exclusive = {}
+        self.stacks = {}
+
+        # (function, cycle it was entered)
+
+        self.stack = [("(root)", cycle)]
+        self.last = cycle
+
+    def account(self, cycle):
+        """Charges the cycles since the last event to the current stack"""
+
+        cycles = cycle - self.last
+        name = self.stack[-1][0]
+        path = tuple(frame[0] for frame in self.stack)
+
+        self.exclusive[name] = self.exclusive.get(name, 0) + cycles
+        self.stacks[path] = self.stacks.get(path, 0) + cycles
+        self.last = cycle
+
+    def enter(self, cpu, cycle):
+
+        self.account(cycle)
+
+        address = cpu.RAM[15]
 
+        self.stack.append((self.names.get(address, "0x%04x" % address), cycle))
 
+    def leave(self, cpu, cycle):
 
-c = CPU(rom)
-c.IO.screen.after(1000, c.start())
+        self.account(cycle)
 
-try:
-    c.IO.screen.mainloop()
-finally:
-    c.mythread.stop()
-    print("Total iterations: %i" % c.iterations)
-    print("Average Hz: %i" % c.hz)
+        if len(self.stack) > 1:
+
+            name, entered = self.stack.pop()
+
+            if name not in (frame[0] for frame in self.stack):
+                self.inclusive[name] = self.inclusive.get(name, 0) + cycle - entered
+
+    def finish(self, cycle):
+        """Charges everything up to cycle, including the functions still
+        on the stack, without changing the stack.
+
+        Returns => inclusive cycles, including unfinished calls"""
+
+        self.account(cycle)
+
+        inclusive = dict(self.inclusive)
+        seen = set()
+
+        for name, entered in self.stack:
+            if name not in seen:
+                seen.add(name)
+                inclusive[name] = inclusive.get(name, 0) + cycle - entered
+
+        return inclusive
+
+    def text(self, cycle, n=30):
+
+        inclusive = self.finish(cycle)
+
+        lines = ["%12s %12s  %s" % ("inclusive", "exclusive", "function")]
+
+        for name in sorted(inclusive, key=lambda name: -inclusive[name])[:n]:
+            lines.append("%12i %12i  %s" % (inclusive[name], self.exclusive.get(name, 0), name))
+
+        return "\n".join(lines)
+
+    def collapsed(self):
+        """Returns => the stacks in the collapsed format read by
+        flamegraph.pl, speedscope and friends"""
+
+        return "\n".join("%s %i" % (";".join(path), cycles)
+                         for path, cycles in sorted(self.stacks.items()) if cycles)
+
+
+class StoppableThread(threading.Thread):
+    """Thread class with a stop() method. The thread itself has to check
+    regularly for the stopped() condition."""
+
+    def __init__(self, *args, **kwargs):
+        super(StoppableThread, self).__init__(*args, **kwargs)
+        self._stopflag = threading.Event()
+
+    def stop(self):
+        self._stopflag.set()
+
+    def stopped(self):
+        return self._stopflag.isSet()
+
+
+class StoppableProcess(multiprocessing.Process):
+    """Process class with the same stop() method as StoppableThread.
+    Inside the process, wait() blocks until stop() is called."""
+
+    def __init__(self, *args, **kwargs):
+        super(StoppableProcess, self).__init__(*args, **kwargs)
+        self._stopflag = multiprocessing.Event()
+
+    def stop(self):
+        self._stopflag.set()
+
+    def stopped(self):
+        return self._stopflag.is_set()
+
+    def wait(self):
+        self._stopflag.wait()
+
+
+
+
+class IO:
+    """Tk screen and keyboard for a CPU.
+
+    A CPU talks to its device through
+
+        attach(cpu)     called once by the CPU that owns it, the screen
+                        is read from cpu.SCREEN and key codes go into
+                        cpu.KBD[0]
+        tick(cycle)     called between runs with the cycle count
+        quiet(cycle)    how many cycles from cycle the keyboard is known
+                        not to change for, None if it is live input
+        milliseconds(cycle)
+                        the time for the timer register at cycle
+
+    The CPU never draws.  Every 1/fps seconds the Tk thread compares
+    screen memory to the last frame it drew and pushes each run of
+    changed rows to the image with a single put().
+
+    Without a keyboard, key presses go straight into the keyboard word.
+    With one they go to keyboard.press(), and the keyboard word only
+    changes when the CPU ticks the device: a KeyRecorder records each
+    change with its cycle, a ScriptedKeyboard replays recorded input and
+    ignores the keys.  Either needs a CPU in this process.  The timer
+    is the wall clock, or simulated time (see simulatedHz) with a
+    keyboard, so that recorded input replays exactly."""
+
+    def __init__(self, thread=None, fps=30, keyboard=None):
+
+        # tkinter is only needed when there is a display to draw on
+
+        from tkinter import Tk, PhotoImage, Label
+
+       # set up screen, width = 512, height = 256
+
+        self.mythread = thread
+        self.screen = Tk()
+        self.screen.title("Jarvis Simulator")
+        self.screen.geometry("512x256+1600+500")
+        self.screen.wm_maxsize(width=512, height=256)
+        self.screen.wm_minsize(width=512, height=256)
+        self.screen.wm_resizable(width=False, height=False)
+
+        self.image = PhotoImage(width = 512, height = 256)
+
+        self.label = Label(self.screen, image=self.image)
+
+        self.label.grid()
+
+        self.drawFill("black")
+
+        # 16 pixels for every possible screen word, least significant bit
+        # leftmost
+
+        byte = [" ".join(("black", "green")[b >> i & 1] for i in range(8)) for b in range(256)]
+
+        self.pixels = [byte[w & 255] + " " + byte[w >> 8] for w in range(65536)]
+        self.frame = array("H", bytes(16384))
+        self.period = 1000 // fps
+
+        # set up keyboard
+
+        self.keyboard = keyboard
+
+        for c in self.Keycodes.keys():
+            exec("self.screen.bind(\"<%s>\", self.%s)" % (c, c))
+
+        self.screen.bind("<Any-KeyPress>", self.KeyPressed)
+        self.screen.bind("<Any-KeyRelease>", self.KeyReleased)
+
+        system("xset r off")
+        self.screen.protocol("WM_DELETE_WINDOW", self.delete_callback)
+
+    def attach(self, cpu):
+        self.mythread = cpu.mythread
+        self.kbd = cpu.KBD
+        self.memory = cpu.SCREEN.cast("B").cast("H")
+        self.epoch = time.monotonic()
+
+        self.screen.after(self.period, self.refresh)
+
+    def tick(self, cycle):
+        if self.keyboard is not None and self.keyboard.tick(cycle):
+            self.kbd[0] = self.keyboard.KBD
+
+    def quiet(self, cycle):
+        if self.keyboard is None:
+            return None
+
+        return self.keyboard.quiet(cycle)
+
+    def milliseconds(self, cycle):
+        if self.keyboard is None:
+            return int((time.monotonic() - self.epoch) * 1000)
+
+        return cycle * 1000 // simulatedHz
+
+    def refresh(self):
+        """Draws the rows of screen memory that changed since the last
+        frame and schedules the next frame."""
+
+        frame = array("H", self.memory.tobytes())
+        last = self.frame
+        pixels = self.pixels
+
+        rows = []
+
+        for y in range(257):
+
+            if y < 256 and frame[32*y:32*y+32] != last[32*y:32*y+32]:
+                rows.append("{" + " ".join([pixels[w] for w in frame[32*y:32*y+32]]) + "}")
+
+            elif rows:
+                self.image.put(" ".join(rows), to=(0, y - len(rows)))
+                rows = []
+
+        self.frame = frame
+        self.screen.after(self.period, self.refresh)
+
+    def delete_callback(self):
+        system("xset r on")
+        self.mythread.stop()
+        self.screen.destroy()
+        
+        
+        
+    kbd = [0]
+
+    # key handlers write straight into the keyboard word of RAM, or hand
+    # the key to the keyboard
+
+    @property
+    def KBD(self):
+        return self.kbd[0]
+
+    @KBD.setter
+    def KBD(self, code):
+        if self.keyboard is None:
+            self.kbd[0] = code
+        else:
+            self.keyboard.press(code)
+
+    Keycodes = { "Return"     : 128,
+                 "BackSpace"  : 129,
+                 "Left"       : 130,
+                 "Up"         : 131,
+                 "Right"      : 132,
+                 "Down"       : 133,
+                 "Home"       : 134,
+                 "End"        : 135,
+                 "Prior"      : 136,
+                 "Next"       : 137,
+                 "Insert"     : 138,
+                 "Delete"     : 139,
+                 "Escape"     : 140 }
+
+    for i in range(1,13):
+        k = { "F" + str(i) : 140+i }
+        Keycodes.update(k)
+
+    for key in Keycodes.keys():
+        code = Keycodes[key]
+
+        exec("""def %s(self, event):
+                    self.KBD = %s
+                    if debugKBD:
+                        print(%s)""" % (key, code, code))
+
+    def KeyPressed(self, event):
+
+        if event.char:
+            self.KBD = ord(event.char)
+            if debugKBD:
+                print(str(ord(event.char)))
+
+    def KeyReleased(self, event):
+
+        self.KBD = 0
+
+        if debugKBD:
+            print("Key Released.\n")
+
+
+    def drawFill(self, color):
+
+        horizontal_line = "{" + " ".join([color]*self.image.width()) + "}"
+        self.image.put(" ".join([horizontal_line] * self.image.height()))
+
+
+def pbm_image(frame):
+    """Returns => a frame as a binary PBM (P4) image"""
+
+    return b"P4\n512 256\n" + frame.translate(reversedBits)
+
+def png_image(frame):
+    """Returns => a frame as a 1 bit grayscale PNG image"""
+
+    data = frame.translate(invertedBits)
+    rows = b"".join(b"\0" + data[row:row + 64] for row in range(0, 16384, 64))
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 512, 256, 1, 0, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+def write_image(filename, frame):
+    """Writes a frame to a .png or a .pbm file, by its extension"""
+
+    with open(filename, "wb") as outputfile:
+        outputfile.write(png_image(frame) if filename.lower().endswith(".png") else pbm_image(frame))
+
+def read_stream(filename):
+    """Plays back a frame stream written by a StreamScreen.
+
+    Returns => iterator of (cycle, frame) pairs"""
+
+    with (gzip.open if filename.endswith(".gz") else open)(filename, "rb") as inputfile:
+
+        if inputfile.read(8) != StreamScreen.magic:
+            raise Error("%s is not a frame stream" % filename)
+
+        frame = bytearray(16384)
+
+        while True:
+            record = inputfile.read(frameRecord.size)
+
+            if len(record) < frameRecord.size:
+                return
+
+            cycle, runs = frameRecord.unpack(record)
+
+            for run in range(runs):
+                start, words = frameRun.unpack(inputfile.read(frameRun.size))
+                frame[2 * start:2 * (start + words)] = inputfile.read(2 * words)
+
+            yield (cycle, bytes(frame))
+
+
+class NullScreen:
+    """Screen that draws nothing."""
+
+    def refresh(self, memory, cycle=None):
+        pass
+
+
+class RecordingScreen(NullScreen):
+    """Screen that keeps every distinct frame it is refreshed with, as
+    the bytes of screen memory."""
+
+    def __init__(self):
+        self.frames = []
+
+    def refresh(self, memory, cycle=None):
+
+        frame = memory.tobytes()
+
+        if not self.frames or frame != self.frames[-1]:
+            self.frames.append(frame)
+
+
+class ImageScreen(NullScreen):
+    """Screen that writes every frame it is refreshed with to an image
+    file, a PNG or a PBM by the extension of pattern.  The file is
+    named pattern % cycle, or % the number of the frame when the cycle is
+    not known."""
+
+    def __init__(self, pattern="frame%09i.png"):
+        self.pattern = pattern
+        self.count = 0
+
+    def refresh(self, memory, cycle=None):
+
+        write_image(self.pattern % (self.count if cycle is None else cycle), memory.tobytes())
+        self.count += 1
+
+
+class StreamScreen(NullScreen):
+    """Screen that appends every frame it is refreshed with to one file,
+    as the rows that changed since the frame before (see frameRecord),
+    gzipped if filename ends in .gz.  read_stream() plays it back.
+
+    close() the screen when done."""
+
+    magic = b"HACKSCRN"
+
+    def __init__(self, filename):
+
+        self.outputfile = (gzip.open if filename.endswith(".gz") else open)(filename, "wb")
+        self.outputfile.write(self.magic)
+        self.last = bytes(16384)
+        self.count = 0
+
+    def refresh(self, memory, cycle=None):
+
+        frame = memory.tobytes()
+        last = self.last
+        runs = []
+
+        # runs of whole rows, rows are 64 bytes
+
+        for row in range(0, 16384, 64):
+            if frame[row:row + 64] != last[row:row + 64]:
+                if runs and runs[-1][1] == row:
+                    runs[-1][1] = row + 64
+                else:
+                    runs.append([row, row + 64])
+
+        record = [frameRecord.pack(self.count if cycle is None else cycle, len(runs))]
+
+        for start, end in runs:
+            record.append(frameRun.pack(start // 2, (end - start) // 2))
+            record.append(frame[start:end])
+
+        self.outputfile.write(b"".join(record))
+        self.last = frame
+        self.count += 1
+
+    def close(self):
+        self.outputfile.close()
+
+
+def read_keys(filename):
+    """Reads keyboard events from a file of "cycle keycode" lines (see
+    KeyRecorder.save()).
+
+    Returns => list of (cycle, keycode) pairs"""
+
+    with open(filename) as inputfile:
+        return [tuple(map(int, line.split())) for line in inputfile if line.strip()]
+
+class ScriptedKeyboard:
+    """Keyboard that presses keys at given cycle counts.
+
+    events is an iterable of (cycle, keycode) pairs in cycle order, a
+    keycode of 0 releases the key, or the name of a file of them (see
+    read_keys()).  CPU.run() stops at every event, so each one lands on
+    exactly its cycle and a run replays the same way every time."""
+
+    def __init__(self, events=()):
+
+        if isinstance(events, str):
+            events = read_keys(events)
+
+        self.KBD = 0
+        self.events = list(events)
+        self.next = 0
+
+    def press(self, code):
+        """Live key presses do not change scripted input."""
+        pass
+
+    def tick(self, cycle):
+        """Returns => True if a key was pressed or released"""
+
+        events = self.events
+        first = self.next
+
+        # the CPU was rewound, replay from the start
+
+        if first and events[first - 1][0] > cycle:
+            self.KBD = 0
+            self.next = first = 0
+
+        while self.next < len(events) and events[self.next][0] <= cycle:
+            self.KBD = events[self.next][1]
+            self.next += 1
+
+        return self.next != first
+
+    def quiet(self, cycle):
+        """Returns => cycles from cycle until the next event"""
+
+        if self.next < len(self.events):
+            return max(0, self.events[self.next][0] - cycle)
+
+        return sys.maxsize
+
+
+class KeyRecorder:
+    """Keyboard that takes live key presses and records them with the
+    cycle at which the program first sees them.
+
+    press() may be called from any thread, the key only reaches the
+    keyboard word on the next tick().  events is then the list of
+    (cycle, keycode) pairs a ScriptedKeyboard replays."""
+
+    def __init__(self):
+        self.KBD = 0
+        self.key = 0
+        self.events = []
+
+    def press(self, code):
+        self.key = code
+
+    def tick(self, cycle):
+        """Returns => True if a key was pressed or released"""
+
+        key = self.key
+
+        if key == self.KBD:
+            return False
+
+        self.KBD = key
+        self.events.append((cycle, key))
+
+        return True
+
+    def quiet(self, cycle):
+        return None
+
+    def save(self, filename):
+        """Writes the events as "cycle keycode" lines"""
+
+        with open(filename, "wt") as outputfile:
+            outputfile.write("".join("%i %i\n" % event for event in self.events))
+
+
+class Headless:
+    """Device for running a CPU without a display.
+
+    screen defaults to a NullScreen and keyboard to a ScriptedKeyboard
+    with no events, or it can be a KeyRecorder (see IO for the
+    interface).  The screen sees screen memory when refresh() is called
+    and, if every is given, every that many cycles.  CPU.run() stops at
+    each of those, so with scripted keys the frames are exactly the same
+    every run:
+
+        Headless(StreamScreen("pong.frames.gz"), every=100000)
+
+    The timer register runs on simulated time (see simulatedHz)."""
+
+    def __init__(self, screen=None, keyboard=None, every=None):
+        self.screen = screen or NullScreen()
+        self.keyboard = keyboard or ScriptedKeyboard()
+        self.every = every
+        self.frame = -1
+
+    def attach(self, cpu):
+        self.cpu = cpu
+        self.kbd = cpu.KBD
+        self.memory = cpu.SCREEN
+
+    def tick(self, cycle):
+
+        if self.keyboard.tick(cycle):
+            self.kbd[0] = self.keyboard.KBD
+
+        if self.every and cycle // self.every != self.frame:
+            self.frame = cycle // self.every
+            self.screen.refresh(self.memory, cycle)
+
+    def quiet(self, cycle):
+
+        quiet = self.keyboard.quiet(cycle)
+
+        if self.every and quiet is not None:
+            return min(quiet, self.every - cycle % self.every)
+
+        return quiet
+
+    def milliseconds(self, cycle):
+        return cycle * 1000 // simulatedHz
+
+    def refresh(self):
+        self.screen.refresh(self.memory, self.cpu.iterations)
+
+
+class Remote:
+    """Device of a CPU whose screen and keyboard are handled by another
+    process (see CPUProcess)."""
+
+    def attach(self, cpu):
+        self.epoch = time.monotonic()
+
+    def tick(self, cycle):
+        pass
+
+    def quiet(self, cycle):
+        return None
+
+    def milliseconds(self, cycle):
+        return int((time.monotonic() - self.epoch) * 1000)
+
+
+class DMA:
+    """Copy and fill controller of a CPU created with dma set, with five
+    registers in the I/O page from dmaRegister:
+
+        source, destination, length, fill value, go
+
+    Writing 1 to go copies length words from source to destination, as
+    if through a buffer so the two may overlap, and writing 2 sets them
+    to the fill value.  The transfer is done as the write retires and
+    takes no cycles of its own.  go reads -1 while the controller is
+    ready, and so right after it took a request, and -2 after it refused
+    one that reached outside the memory and screen.  Either way it takes
+    the next one.  That is how the OS knows whether to run its own loop
+    (see Memory.copy)."""
+
+    def go(self, RAM):
+
+        source, destination, length, value, command = RAM[dmaRegister:dmaRegister + 5]
+
+        inside = 0 <= length and 0 <= destination and destination + length <= 24576
+
+        if command not in (1, 2) or not inside or command == 1 and not (0 <= source and source + length <= 24576):
+            RAM[dmaRegister + 4] = -2
+            return
+
+        # an array that views are exported from refuses empty slice
+        # assignments
+
+        if length and command == 1:
+            RAM[destination:destination + length] = RAM[source:source + length]
+        elif length:
+            RAM[destination:destination + length] = array("h", [value]) * length
+
+        RAM[dmaRegister + 4] = -1
+
+
+class CPU:
+
+    ALU = dict((comp, eval("lambda a,d: " + expr.format(a="a", d="d")))
+               for comp, expr in aluSource.items())
+
+    # ALU functions indexed by the c bits of a decoded instruction
+
+    OPS = tuple(map(ALU.get, map(compCodes.get, range(64))))
+
+    # c bits of the ALU functions that are not linear in their inputs
+
+    BITWISE = frozenset(code for code, comp in compCodes.items() if set(comp) & set("!&|"))
+
+    # c bits of the other ALU functions => (a, d) such that a change of
+    # their inputs by da and dd changes the result by a * da + d * dd
+
+    LINEAR = dict((code, (f(1, 0) - f(0, 0), f(0, 1) - f(0, 0)))
+                  for code, f in enumerate(OPS) if f is not None and not set(compCodes[code]) & set("!&|"))
+
+
+
+    def __init__(self, program=None, jit=False, device=None, memory=None, chunk=10000, symbols=None, idle=False, dma=False):
+
+        self.jit = jit
+        self.mythread = StoppableThread(target = self._run)
+
+        # the run loop only checks for stop() and ticks the device every
+        # chunk instructions
+
+        self.chunk = chunk
+        self.iterations = 0
+        self.started = 0
+        self.ticks = None
+        self.tocks = None
+
+        # RAM is ramSize signed 16 bit words: memory, the screen map at
+        # 16384 and the I/O page at 24576.  SCREEN and KBD are views
+        # into it, so devices never copy anything.  memory can supply an
+        # existing buffer of that size to use instead (see CPUProcess).
+
+        if memory is None:
+            self.RAM = array("h", bytes(2 * ramSize))
+        else:
+            self.RAM = memoryview(memory).cast("B").cast("h")
+
+        self.SCREEN = memoryview(self.RAM)[16384:24576]
+        self.KBD = memoryview(self.RAM)[24576:24577]
+
+        # without a device the CPU runs headless
+
+        self.IO = device or Headless()
+        self.IO.attach(self)
+        
+        # Load the passed program into the ROM and reset the CPU
+        
+        self.reset()
+        
+        if program is not None:
+            self.ROM = decode(program)
+
+        # compiled basic blocks keyed by their starting PC.  ROM is read
+        # only so nothing ever needs to be invalidated.
+
+        self.blocks = {}
+        self.leaders = None
+
+        # profiling counters, see profile()
+
+        self.counts = None
+        self.entries = None
+
+        # address => function(cpu, cycle), see hook()
+
+        self.hooks = {}
+
+        # address => native block run in place of a VM function, see trap()
+
+        self.traps = {}
+
+        # copy and fill controller, see DMA
+
+        self.dma = DMA() if dma else None
+
+        # counters of meter(), and the block cache it set aside for blocks
+        # compiled with counting code
+
+        self.meters = None
+        self.unmetered = None
+
+        # TraceBuffer of trace()
+
+        self.tracer = None
+
+        # breakpoint and watchpoint bitmaps over ROM and RAM, and how many
+        # bits are set in them.  Only while armed does execute() switch to
+        # the slower debug loop, see breakpoint() and watch().
+
+        self.breakpoints = bytearray(len(self.ROM) if program is not None else 0)
+        self.watchpoints = bytearray(len(self.RAM))
+        self.armed = 0
+
+        self.event = None
+        self.resume = None
+
+        # (iterations, snapshot) ring buffer, see record()
+
+        self.history = None
+        self.interval = None
+
+        # skip idle loops, see fastforward().  A probe that finds nothing
+        # to skip puts off the next one for twice as many chunks.  skipped
+        # counts the instructions skipped in all.
+
+        self.idle = idle
+        self.idlewait = 0
+        self.idlebackoff = 1
+        self.skipped = 0
+
+        # labels for breakpoint(), stepover() and stepout().  Calls to
+        # Sys.breakpoint() break by default.
+
+        self.symbols = symbols or {}
+
+        if program is not None and "SYS.BREAKPOINT" in self.symbols:
+            self.breakpoint("SYS.BREAKPOINT")
+
+    def __str__(self):
+        return ({"PC":self.PC, "A":self.A, "D":self.D, "zr":self.zr, "ng": self.ng})
+
+    def reset(self):
+        # Initialize memory and registers
+
+        self.PC = 0
+        self.zr = 0
+        self.ng = 0
+        self.A = 0
+        self.D = 0
+
+        self.RAM[:] = array("h", bytes(2 * len(self.RAM)))
+
+    def start(self):
+
+        self.ticks = time.time()
+        self.tocks = None
+        self.started = self.iterations
+
+        self.mythread.start()
+
+    def stop(self):
+
+        self.mythread.stop()
+
+        if self.mythread.is_alive():
+            self.mythread.join()
+
+    def _run(self):
+
+        stopped = self.mythread.stopped
+        tick = self.IO.tick
+        chunk = self.chunk
+        rate = None
+
+        try:
+            while not stopped():
+                self.clock()
+                tick(self.iterations)
+
+                # sleep through skipped idle loops for as long as running
+                # them would have taken
+
+                skipped = 0
+
+                if self.idle:
+                    ran, skipped = self.skipidle(chunk)
+
+                quiet = self.IO.quiet(self.iterations)
+                period = clockPeriod - self.iterations % clockPeriod
+
+                if skipped:
+                    time.sleep(skipped / (rate or 1e6))
+                elif quiet is not None and quiet < min(chunk, period):
+                    self.iterations += self.execute(quiet, (), True)
+                else:
+                    started = time.time()
+                    n = self.execute(min(chunk, period), (), period <= chunk, sys.maxsize if quiet is None else quiet)
+                    self.iterations += n
+
+                    if time.time() > started:
+                        rate = n / (time.time() - started)
+
+                if self.history is not None:
+                    self.remember()
+
+                # breakpoints and watchpoints pause the thread
+
+                if self.event is not None:
+                    break
+        finally:
+            self.tocks = time.time()
+
+    @property
+    def hz(self):
+        return self.stats()["hz"]
+
+    def stats(self):
+        """Throughput of the run loop since start()
+
+        Returns => dict of instructions retired (including any before
+                   start(), e.g. by boot()), wall seconds and effective Hz"""
+
+        if self.ticks is None:
+            seconds = 0
+        else:
+            seconds = (self.tocks or time.time()) - self.ticks
+
+        return { "iterations" : self.iterations,
+                 "seconds"    : seconds,
+                 "hz"         : (self.iterations - self.started) / seconds if seconds else 0 }
+
+    def execute(self, count, stops=(), exact=False, limit=None):
+        """Executes count instructions, keeping registers in locals.  In
+        jit mode whole blocks are executed, so a few more may run unless
+        exact is set.  When limit is given a trap (see trap()) may run
+        past count, exact or not, but not past limit instructions.  run()
+        uses this to end at clock boundaries without turning traps down,
+        since they cost far more than a clockPeriod.  Execution stops
+        early before any address in stops.
+        Hooks (see hook()) are called before the instruction at their
+        address runs.  While breakpoints or watchpoints are armed every
+        instruction is interpreted by executedebug().
+
+        Returns => number of instructions executed"""
+
+        self.event = None
+
+        if self.hooks:
+            return self.executehooked(count, stops, exact, limit)
+        elif self.armed:
+            return self.executedebug(count, stops)
+        elif self.jit and self.tracer is None:
+            return self.executeblocks(count, stops, exact, limit)
+        else:
+            return self.interpret(count, stops)
+
+    def executehooked(self, count, stops=(), exact=False, limit=None):
+        """execute() with hooks: hooked addresses are treated as stops,
+        and each time one is reached its hook is called and execution
+        carries on from there."""
+
+        hooks = self.hooks
+        traps = frozenset(stops).union(hooks)
+        n = 0
+
+        while n < count and self.PC not in stops and self.event is None:
+
+            if self.PC in hooks:
+
+                # break before the hook is called, not after
+
+                if self.armed and self.breakpoints[self.PC] and self.resume != self.PC:
+                    self.event = DebugEvent("breakpoint", self.PC, None, None, None)
+                    self.resume = self.PC
+                    break
+
+                hooks[self.PC](self, self.iterations + n)
+
+                # run the hooked instruction (or block) itself
+
+                if self.armed:
+                    n += self.executedebug(1)
+                elif self.jit and self.tracer is None:
+                    n += self.executeblocks(1, (), exact, None if limit is None else limit - n)
+                else:
+                    n += self.interpret(1)
+
+            elif self.armed:
+                n += self.executedebug(count - n, traps)
+            elif self.jit and self.tracer is None:
+                n += self.executeblocks(count - n, traps, exact, None if limit is None else limit - n)
+            else:
+                n += self.interpret(count - n, traps)
+
+        return n
+
+    def interpret(self, count, stops=()):
+        """Interprets count instructions from the decoded ROM, stopping
+        early before any address in stops.
+
+        Returns => number of instructions executed"""
+
+        if self.tracer is not None:
+            return self.interprettraced(count, stops)
+
+        if self.meters is not None:
+            return self.interpretmetered(count, stops)
+
+        rom = self.ROM
+        words, abit, comp, dest, jump = rom.words, rom.abit, rom.comp, rom.dest, rom.jump
+        ops = self.OPS
+        RAM = self.RAM
+
+        pc, A, D = self.PC, self.A, self.D
+        cond = 0
+
+        counts = self.counts
+        go = None if self.dma is None else dmaRegister + 4
+
+        try:
+            for n in range(count):
+
+                if pc in stops:
+                    break
+
+                if counts is not None:
+                    counts[pc] += 1
+
+                word = words[pc]
+
+                if word < 0x8000:
+                    A = word
+                    pc += 1
+                    continue
+
+                result = ops[comp[pc]](RAM[A] if abit[pc] else A, D)
+
+                if result == 0:
+                    cond = 2
+                elif result < 0:
+                    cond = 4
+                else:
+                    cond = 1
+
+                d = dest[pc]
+
+                if jump[pc] & cond:
+                    pc = A
+                else:
+                    pc += 1
+
+                if d:
+                    if d & 1:
+                        RAM[A] = result
+                        if A == go:
+                            self.dma.go(RAM)
+                    if d & 4:
+                        A = result
+                    if d & 2:
+                        D = result
+            else:
+                n = count
+
+        finally:
+            self.PC, self.A, self.D = pc, A, D
+
+            if cond:
+                self.zr = cond >> 1 & 1
+                self.ng = cond >> 2
+
+        return n
+
+    def interpretmetered(self, count, stops=()):
+        """interpret() that counts for meter(): executions per address,
+        jumps taken and RAM traffic by region."""
+
+        rom = self.ROM
+        words, abit, comp, dest, jump = rom.words, rom.abit, rom.comp, rom.dest, rom.jump
+        ops = self.OPS
+        RAM = self.RAM
+
+        pc, A, D = self.PC, self.A, self.D
+        cond = 0
+
+        counts = self.counts
+        executed, taken, traffic = self.meters["COUNTS"], self.meters["TAKEN"], self.meters["TRAFFIC"]
+        go = None if self.dma is None else dmaRegister + 4
+
+        try:
+            for n in range(count):
+
+                if pc in stops:
+                    break
+
+                if counts is not None:
+                    counts[pc] += 1
+
+                executed[pc] += 1
+
+                word = words[pc]
+
+                if word < 0x8000:
+                    A = word
+                    pc += 1
+                    continue
+
+                if abit[pc]:
+                    traffic[A] += 1
+                    result = ops[comp[pc]](RAM[A], D)
+                else:
+                    result = ops[comp[pc]](A, D)
+
+                if result == 0:
+                    cond = 2
+                elif result < 0:
+                    cond = 4
+                else:
+                    cond = 1
+
+                d = dest[pc]
+
+                if jump[pc] & cond:
+                    taken[pc] += 1
+                    pc = A
+                else:
+                    pc += 1
+
+                if d:
+                    if d & 1:
+                        traffic[ramSize + A] += 1
+                        if 16383 < A < 24576 and RAM[A] != result:
+                            traffic[2 * ramSize] += 1
+                        RAM[A] = result
+                        if A == go:
+                            self.dma.go(RAM)
+                    if d & 4:
+                        A = result
+                    if d & 2:
+                        D = result
+            else:
+                n = count
+
+        finally:
+            self.PC, self.A, self.D = pc, A, D
+
+            if cond:
+                self.zr = cond >> 1 & 1
+                self.ng = cond >> 2
+
+        return n
+
+    def interprettraced(self, count, stops=()):
+        """interpret() that records every instruction in the TraceBuffer
+        of trace()."""
+
+        rom = self.ROM
+        words, abit, comp, dest, jump = rom.words, rom.abit, rom.comp, rom.dest, rom.jump
+        ops = self.OPS
+        RAM = self.RAM
+
+        pc, A, D = self.PC, self.A, self.D
+        cond = 0
+
+        counts = self.counts
+
+        tracer = self.tracer
+        buffer, length = tracer.buffer, tracer.length
+        pack, size = traceRecord.pack_into, traceRecord.size
+        index = tracer.count % length
+        go = None if self.dma is None else dmaRegister + 4
+
+        n = 0
+
+        try:
+            for n in range(count):
+
+                if pc in stops:
+                    break
+
+                if counts is not None:
+                    counts[pc] += 1
+
+                word = words[pc]
+
+                if word < 0x8000:
+                    pack(buffer, index * size, pc, word, D, noWrite, 0)
+                    index = index + 1 if index + 1 < length else 0
+                    A = word
+                    pc += 1
+                    continue
+
+                result = ops[comp[pc]](RAM[A] if abit[pc] else A, D)
+
+                if result == 0:
+                    cond = 2
+                elif result < 0:
+                    cond = 4
+                else:
+                    cond = 1
+
+                d = dest[pc]
+                address = noWrite
+                last = pc
+
+                if jump[pc] & cond:
+                    pc = A
+                else:
+                    pc += 1
+
+                if d:
+                    if d & 1:
+                        RAM[A] = result
+                        address = A & 0xFFFF
+                        if A == go:
+                            self.dma.go(RAM)
+                    if d & 4:
+                        A = result
+                    if d & 2:
+                        D = result
+
+                pack(buffer, index * size, last, A, D, address, result if address != noWrite else 0)
+                index = index + 1 if index + 1 < length else 0
+            else:
+                n = count
+
+        finally:
+            self.PC, self.A, self.D = pc, A, D
+            tracer.count += n
+
+            if cond:
+                self.zr = cond >> 1 & 1
+                self.ng = cond >> 2
+
+        return n
+
+    def executedebug(self, count, stops=()):
+        """interpret() with breakpoints and watchpoints.  Stops before the
+        instruction at a breakpoint, or after an instruction that changes
+        a watched RAM word, and leaves a DebugEvent in self.event.
+
+        Execution resuming at the breakpoint it stopped at does not break
+        there again.
+
+        Returns => number of instructions executed"""
+
+        rom = self.ROM
+        words, abit, comp, dest, jump = rom.words, rom.abit, rom.comp, rom.dest, rom.jump
+        ops = self.OPS
+        RAM = self.RAM
+        breakpoints, watchpoints = self.breakpoints, self.watchpoints
+
+        pc, A, D = self.PC, self.A, self.D
+        cond = 0
+
+        counts = self.counts
+
+        skip = self.resume
+        self.resume = None
+
+        go = None if self.dma is None else dmaRegister + 4
+
+        event = None
+        n = 0
+
+        try:
+            while n < count:
+
+                if pc in stops:
+                    break
+
+                if breakpoints[pc] and pc != skip:
+                    event = DebugEvent("breakpoint", pc, None, None, None)
+                    self.resume = pc
+                    break
+
+                skip = None
+                n += 1
+
+                if counts is not None:
+                    counts[pc] += 1
+
+                word = words[pc]
+
+                if word < 0x8000:
+                    A = word
+                    pc += 1
+                    continue
+
+                result = ops[comp[pc]](RAM[A] if abit[pc] else A, D)
+
+                if result == 0:
+                    cond = 2
+                elif result < 0:
+                    cond = 4
+                else:
+                    cond = 1
+
+                d = dest[pc]
+
+                if d & 1:
+                    if watchpoints[A] and RAM[A] != result:
+                        event = DebugEvent("watchpoint", pc, A, RAM[A], result)
+                    RAM[A] = result
+                    if A == go:
+                        self.dma.go(RAM)
+
+                if jump[pc] & cond:
+                    pc = A
+                else:
+                    pc += 1
+
+                if d & 4:
+                    A = result
+                if d & 2:
+                    D = result
+
+                if event:
+                    break
+
+        finally:
+            self.PC, self.A, self.D = pc, A, D
+            self.event = event
+
+            if cond:
+                self.zr = cond >> 1 & 1
+                self.ng = cond >> 2
+
+        return n
+
+    def executeblocks(self, count, stops=(), exact=False, limit=None):
+        """Executes compiled blocks until at least count instructions
+        have run, or PC reaches an address in stops.  Blocks that would
+        run past an address in stops, or past count when exact is set,
+        are interpreted instead.  With limit, traps are only interpreted
+        instead when they would run past it (see execute()).
+
+        Returns => number of instructions executed"""
+
+        blocks = self.blocks
+        RAM = self.RAM
+
+        pc, A, D = self.PC, self.A, self.D
+        last = None
+        n = 0
+
+        entries = self.entries
+        traps = self.traps
+
+        # start => whether the block starting there runs over a stop
+
+        spans = {}
+
+        try:
+            while n < count and pc not in stops:
+
+                block = blocks.get(pc) or self.compile(pc)
+
+                if stops:
+                    span = spans.get(pc)
+                    if span is None:
+                        size = traps[pc].block.size if pc in traps else block.size
+                        span = spans[pc] = any(pc < stop < pc + size for stop in stops)
+                else:
+                    span = False
+
+                if limit is not None and pc in traps:
+                    over = n + block.size > limit
+                else:
+                    over = exact and n + block.size > count
+
+                if span or over:
+
+                    self.PC, self.A, self.D = pc, A, D
+                    n += self.interpret(min(block.size, count - n), stops)
+                    pc, A, D = self.PC, self.A, self.D
+                    last = None
+                    continue
+
+                start = pc
+
+                pc, A, D, result, k = block(A, D, RAM)
+                n += k
+
+                # a block always executes start .. start + k - 1, a trap
+                # executes no instructions at all
+
+                if entries is not None and start not in traps:
+                    entries[start] += 1
+                    entries[start + k] -= 1
+
+                if result is not None:
+                    last = result
+
+        finally:
+            self.PC, self.A, self.D = pc, A, D
+
+            if last is not None:
+                self.zr = int(last == 0)
+                self.ng = int(last < 0)
+
+        return n
+
+    def profile(self, enable=True):
+        """Starts counting executions per ROM address (from zero), or
+        stops when enable is false.
+
+        The interpreter counts every instruction.  Compiled blocks only
+        count their entry and exit in a difference array, since a block
+        always runs a contiguous range of addresses."""
+
+        if enable:
+            self.counts = array("q", bytes(8 * (len(self.ROM) + 1)))
+            self.entries = array("q", bytes(8 * (len(self.ROM) + 1)))
+        else:
+            self.counts = self.entries = None
+
+    def profilecounts(self):
+        """Returns => list of executions per ROM address since profile()"""
+
+        if self.counts is None:
+            return [0] * len(self.ROM)
+
+        counts = list(self.counts[:-1])
+        running = 0
+
+        for pc in range(len(counts)):
+            running += self.entries[pc]
+            counts[pc] += running
+
+        return counts
+
+    def report(self, symbols):
+        """Returns => Profile of the counts since profile(), labelled with
+        symbols (see make_symboltable)"""
+
+        return Profile(self.profilecounts(), symbols)
+
+    def hook(self, address, function):
+        """Calls function(cpu, cycle) every time PC reaches address, just
+        before the instruction there runs.  cycle is the number of
+        instructions retired so far.  A function of None removes the hook.
+
+        Hooked addresses are handled like stops, so they cost nothing
+        while execution is elsewhere."""
+
+        if function is None:
+            self.hooks.pop(address, None)
+        else:
+            self.hooks[address] = function
+
+    def trap(self, address, function, nargs=0, cost=1):
+        """Runs function(RAM, *args) in place of the VM function at address
+        (a ROM address or a label).  args are the function's nargs
+        arguments, and whatever it returns becomes the function's return
+        value, after which execution carries on in the (return) routine
+        exactly as if the VM function had returned.  A trap that returns
+        None declines, and the VM function runs after all.  A function of
+        None removes the trap.
+
+        A trap counts as cost instructions, though not in profiles.  Traps
+        live in the block cache, so they only run in jit mode, and not
+        while breakpoints or watchpoints are armed."""
+
+        address = self.address(address)
+
+        if function is None:
+            if address in self.traps:
+                native = self.traps.pop(address)
+                for blocks in (self.blocks, self.unmetered or {}):
+                    if blocks.get(address) is native:
+                        blocks[address] = native.block
+            return
+
+        if "RETURN" not in self.symbols:
+            raise CallGraphError("the program has no (return) routine")
+
+        ret = self.symbols["RETURN"]
+        block = self.traps[address].block if address in self.traps else self.blocks.get(address) or self.compile(address)
+
+        def native(A, D, RAM):
+
+            arg = RAM[2]
+            value = function(RAM, *RAM[arg:arg + nargs])
+
+            if value is None:
+                return block(A, D, RAM)
+
+            # push the return value, the (return) routine pops it into *ARG
+
+            sp = RAM[0]
+            RAM[sp] = value
+            RAM[0] = sp + 1
+
+            return (ret, A, D, None, cost)
+
+        # run the VM function instead when the end of an exact run comes
+        # within cost instructions
+
+        native.size = max(block.size, cost)
+        native.block = block
+
+        self.traps[address] = self.blocks[address] = native
+
+    def meter(self, enable=True):
+        """Starts counting the instruction mix and RAM traffic (from zero),
+        or stops when enable is false.  See metrics().
+
+        Blocks are compiled again with the counters built in, and kept
+        in a cache of their own until metering stops.  A block only counts
+        which way it left, everything else it did is worked out from that
+        afterwards, so accesses through computed addresses are all that
+        cost anything extra.  Traps (see trap()) and the debug loop are
+        not counted."""
+
+        if enable:
+
+            if self.meters is None:
+                self.unmetered = self.blocks
+
+            # EXITS counts the ways out of compiled blocks, which exits
+            # describes (see block_source)
+
+            self.blocks = dict(self.traps)
+            self.meters = { "COUNTS"  : array("q", bytes(8 * len(self.ROM))),
+                            "TAKEN"   : array("q", bytes(8 * len(self.ROM))),
+                            "TRAFFIC" : array("q", bytes(8 * (2 * ramSize + 1))),
+                            "EXITS"   : array("q"),
+                            "exits"   : [] }
+
+        elif self.meters is not None:
+
+            self.blocks = self.unmetered
+            self.blocks.update(self.traps)
+            self.unmetered = None
+            self.meters = None
+
+    def metrics(self):
+        """Returns => Metrics counted since meter()"""
+
+        if self.meters is None:
+            return Metrics(self.ROM, [0] * len(self.ROM), [0] * len(self.ROM), [0] * (2 * ramSize + 1))
+
+        counts = list(self.meters["COUNTS"])
+        taken = list(self.meters["TAKEN"])
+        traffic = list(self.meters["TRAFFIC"])
+
+        # a block always executes start .. start + count - 1
+
+        entries = [0] * (len(counts) + 1)
+
+        for (start, count, jump, known), n in zip(self.meters["exits"], self.meters["EXITS"]):
+
+            if not n:
+                continue
+
+            entries[start] += n
+            entries[start + count] -= n
+
+            if jump is not None:
+                taken[jump] += n
+
+            for index, accesses in known:
+                traffic[index] += accesses * n
+
+        running = 0
+
+        for pc in range(len(counts)):
+            running += entries[pc]
+            counts[pc] += running
+
+        return Metrics(self.ROM, counts, taken, traffic)
+
+    def trace(self, enable=True, length=1 << 20, filename=None):
+        """Starts recording every instruction (see traceRecord) in a ring
+        buffer of the last length, or stops when enable is false.
+
+        If filename is given, run() writes the trace there when it stops
+        at until_pc, as it does at a halt loop (see find_halts()), or
+        when the program fails, e.g. with an IndexError for PC past the
+        end of ROM.  Trace.py decodes it.
+
+        While tracing every instruction is interpreted, idle loops are
+        not skipped and traps do not run.  The debug loop of breakpoints
+        and watchpoints is not traced.
+
+        Returns => TraceBuffer"""
+
+        if enable:
+            self.tracer = TraceBuffer(length, self.iterations, filename)
+        else:
+            self.tracer = None
+
+        return self.tracer
+
+    def callgraph(self, symbols):
+        """Hooks a new CallGraph into the (call) and (return) routines,
+        counting from the current cycle.
+
+        Returns => CallGraph"""
+
+        graph = CallGraph(symbols, self.iterations)
+
+        self.hook(graph.call, graph.enter)
+        self.hook(graph.ret, graph.leave)
+
+        return graph
+
+    def address(self, address):
+        """Returns => address, looked up in self.symbols if it is a label"""
+
+        if isinstance(address, str):
+            return self.symbols[address.upper()]
+
+        return address
+
+    def breakpoint(self, address, enable=True):
+        """Breaks before the instruction at address (a ROM address or a
+        label) runs, or clears the breakpoint when enable is false.
+
+        run() returns with reason "breakpoint" and a running thread
+        stops, leaving a DebugEvent in self.event.  Running again carries
+        on from the breakpoint."""
+
+        address = self.address(address)
+        bit = int(bool(enable))
+
+        self.armed += bit - self.breakpoints[address]
+        self.breakpoints[address] = bit
+
+    def watch(self, address, enable=True, length=1):
+        """Breaks after any instruction that changes one of length RAM
+        words from address (a RAM address or a symbol), or stops watching
+        them when enable is false.
+
+        run() returns with reason "watchpoint" and a running thread
+        stops, leaving a DebugEvent with the old and new value in
+        self.event."""
+
+        address = self.address(address)
+        bit = int(bool(enable))
+
+        for address in range(address, address + length):
+            self.armed += bit - self.watchpoints[address]
+            self.watchpoints[address] = bit
+
+    def stepover(self):
+        """Steps one instruction, or over a whole VM call when that
+        instruction is the jump into the (call) routine.  step() steps
+        into calls.
+
+        Returns => RunResult"""
+
+        rom = self.ROM
+        pc = self.PC
+
+        if rom.words[pc] < 0x8000 or rom.jump[pc] != 7 or self.A != self.symbols.get("CALL"):
+            return self.run(max_cycles=1)
+
+        # the (call) routine takes the return address in D
+
+        return self.stepframes(self.D)
+
+    def stepout(self):
+        """Runs until the current VM function has returned to its caller.
+
+        Returns => RunResult"""
+
+        return self.stepframes(None)
+
+    def stepframes(self, target):
+        """Runs until PC reaches target with no more VM calls active than
+        now.  With a target of None, runs until the current function
+        returns, and then on to its return address.
+
+        Calls and returns are counted each time PC reaches the (call) and
+        (return) routines.  Breakpoints and watchpoints still stop
+        execution on the way.
+
+        Returns => RunResult, with reason "step" once target is reached"""
+
+        if "CALL" not in self.symbols or "RETURN" not in self.symbols:
+            raise CallGraphError("program has no (call) and (return) routines")
+
+        call, ret = self.symbols["CALL"], self.symbols["RETURN"]
+
+        depth = 0
+        cycles = 0
+        started = time.time()
+
+        while True:
+
+            stops = [call, ret] if target is None else [call, ret, target]
+            result = self.run(until_pc=stops)
+            cycles += result.cycles
+
+            if result.reason != "until_pc":
+                reason = result.reason
+                break
+
+            if self.PC == target and depth == 0:
+                reason = "step"
+                break
+
+            if self.PC == call:
+                depth += 1
+            elif self.PC == ret:
+                if depth == 0 and target is None:
+                    # the return address is saved 5 words below LCL
+                    target = self.RAM[self.RAM[1] - 5]
+                else:
+                    depth -= 1
+
+            # move off the stop
+
+            n = self.execute(1, (), True)
+            cycles += n
+            self.iterations += n
+
+            if self.event is not None:
+                reason = self.event.reason
+                break
+
+        return RunResult(cycles, reason, self.PC, time.time() - started)
+
+    def run(self, max_cycles=None, until_pc=None, until_ram=None, until=None, wall_timeout=None, every=None):
+        """Runs at full speed in the calling thread until
+
+            max_cycles      this many instructions have run
+            until_pc        PC reaches this address (or any in this iterable)
+            until_ram       RAM[address] == value for any item of this dict
+            until           until(cpu) returns true
+            wall_timeout    this many seconds have passed
+
+        max_cycles and until_pc are exact: the CPU stops before the
+        instruction at until_pc.  The other conditions are checked every
+        `every` instructions (CPU.chunk by default), which is also when the
+        device is ticked, and after skipping idle loops (see idle and
+        fastforward()).  The device is also ticked exactly at the cycle
+        of every scripted key event (see ScriptedKeyboard), and at every
+        multiple of clockPeriod instructions, after setting the timer and
+        cycle counter registers (see clock()).
+
+        An armed breakpoint or watchpoint also stops the CPU, with reason
+        "breakpoint" or "watchpoint" (see breakpoint() and watch()).  In
+        trace mode the trace is written out at until_pc or when the
+        program fails (see trace()).
+
+        Returns => RunResult(cycles, reason, PC, seconds)"""
+
+        if until_pc is None:
+            stops = frozenset()
+        elif isinstance(until_pc, int):
+            stops = frozenset([until_pc])
+        else:
+            stops = frozenset(until_pc)
+
+        watches = list((until_ram or {}).items())
+        every = every or self.chunk
+
+        cycles = 0
+        reason = None
+        started = time.time()
+
+        while reason is None:
+
+            if self.PC in stops:
+                reason = "until_pc"
+                break
+
+            if max_cycles is not None and cycles >= max_cycles:
+                reason = "max_cycles"
+                break
+
+            self.clock()
+            self.IO.tick(self.iterations)
+
+            if self.idle:
+
+                limit = 1000 * every if max_cycles is None else max_cycles - cycles
+                ran, skipped = self.skipidle(limit, stops)
+
+                cycles += ran + skipped
+
+                if self.PC in stops or max_cycles is not None and cycles >= max_cycles:
+                    continue
+
+            if max_cycles is None or max_cycles - cycles > every:
+                budget, exact = every, False
+            else:
+                budget, exact = max_cycles - cycles, True
+
+            # stop right at the next scripted key event, which the next
+            # tick delivers
+
+            quiet = self.IO.quiet(self.iterations)
+
+            if quiet is not None and quiet < budget:
+                budget, exact = quiet, True
+
+            # stop where the clock registers change next, but let a trap
+            # run over it as far as the end of the run or the key event
+
+            period = clockPeriod - self.iterations % clockPeriod
+            limit = sys.maxsize if max_cycles is None else max_cycles - cycles
+
+            if quiet is not None:
+                limit = min(limit, quiet)
+
+            if period <= budget:
+                budget, exact = period, True
+
+            try:
+                n = self.execute(budget, stops, exact, limit)
+            except Exception:
+                if self.tracer is not None and self.tracer.filename:
+                    self.tracer.dump()
+                raise
+
+            cycles += n
+            self.iterations += n
+
+            if self.history is not None:
+                self.remember()
+
+            if self.event is not None:
+                reason = self.event.reason
+            elif watches and any(self.RAM[address] == value for address, value in watches):
+                reason = "until_ram"
+            elif until and until(self):
+                reason = "until"
+            elif wall_timeout is not None and time.time() - started >= wall_timeout:
+                reason = "wall_timeout"
+
+        if reason == "until_pc" and self.tracer is not None and self.tracer.filename:
+            self.tracer.dump()
+
+        # the clock registers as of the last clockPeriod, also after a
+        # skip to the end
+
+        self.clock()
+
+        return RunResult(cycles, reason, self.PC, time.time() - started)
+
+    def clock(self):
+        """Sets the read-only registers of the I/O page (see ramSize):
+        the milliseconds of the device at timerRegister, and the low and
+        high words of the instructions retired at cyclesRegister.  Both
+        wrap around.
+
+        run() and the run thread stop at every multiple of clockPeriod
+        instructions to call this, and the registers hold the values of
+        the last one, so programs see them change at the same cycles in
+        every mode.  Writes to them do not last beyond that."""
+
+        RAM = self.RAM
+        cycle = self.iterations - self.iterations % clockPeriod
+        milliseconds = self.IO.milliseconds(cycle)
+
+        RAM[timerRegister] = (milliseconds + 32768 & 65535) - 32768
+        RAM[cyclesRegister] = (cycle + 32768 & 65535) - 32768
+        RAM[cyclesRegister + 1] = ((cycle >> 16) + 32768 & 65535) - 32768
+
+        # a DMA controller shows it is ready, also after reset()
+
+        if self.dma is not None and RAM[dmaRegister + 4] == 0:
+            RAM[dmaRegister + 4] = -1
+
+    def skipidle(self, limit, stops=()):
+        """Calls fastforward() while it finds loops to skip, but only
+        every few calls while it does not.  Counts the instructions in
+        self.iterations as it goes, and sets the clock registers at every
+        multiple of clockPeriod on the way (see clock()).
+
+        Returns => (instructions run, instructions skipped)"""
+
+        if self.hooks or self.armed or self.counts is not None or self.tracer is not None:
+            return (0, 0)
+
+        if self.idlewait:
+            self.idlewait -= 1
+            return (0, 0)
+
+        # with live input, skip no further than the next tick
+
+        quiet = self.IO.quiet(self.iterations)
+        limit = min(limit, self.chunk if quiet is None else quiet)
+
+        ran = skipped = 0
+        length = 1024
+        retries = 0
+
+        while ran + skipped < limit:
+
+            period = clockPeriod - self.iterations % clockPeriod
+            n, k, outer = self.fastforward(limit - ran - skipped, stops, length)
+
+            ran += n
+            skipped += k
+            self.iterations += n + k
+            self.skipped += k
+            self.clock()
+
+            if k:
+                retries = 2
+                continue
+
+            # a loop that waits for the clock is skipped up to where it
+            # moves on.  The trace after that stops there, and the one
+            # after that may still carry what the loop read before.
+
+            if outer is None and retries:
+                retries -= 1
+                continue
+
+            # an inner loop just ended, try the loop around it from where
+            # execution carried on
+
+            if outer is None or length > 1024:
+                break
+
+            length = 16384
+            n = self.execute(min(limit - ran - skipped, period - n), frozenset(stops).union([outer]), True)
+
+            ran += n
+            self.iterations += n
+            self.clock()
+
+            if self.PC != outer:
+                break
+
+        if skipped:
+            self.idlebackoff = 1
+        else:
+            self.idlebackoff = min(64, 2 * self.idlebackoff)
+            self.idlewait = self.idlebackoff
+
+        return (ran, skipped)
+
+    def fastforward(self, limit, stops=(), length=1024):
+        """Skips whole iterations of the loop at PC, if each iteration
+        changes registers and RAM by the same amounts, up to limit
+        instructions in all.  Loops that wait for a key (a fixed point)
+        or count down a delay are like that.  So is one that polls the
+        clock registers (Sys.wait) until the next multiple of clockPeriod,
+        where they move on (see clock()), and it is skipped no further.
+
+        Two iterations of at most length instructions are interpreted to
+        find the loop and its changes, and neither runs past the next
+        multiple of clockPeriod.  Two samples fit any change, so the
+        changes are then followed through the loop (see translates()):
+        only a loop that moves every value it carries by a constant, the
+        same in every iteration, is skipped.  Iterations are only skipped
+        while no ALU result of the loop wraps around and every jump goes
+        the same way.  Input must not change in the meantime, see the
+        quiet() method of devices.
+
+        Skipping never changes where a run ends:
+
+        >>> def run(idle):
+        ...     source = ["(LOOP)", "@x", "D=M", "@y", "M=D+M", "@x", "M=M+1", "@LOOP", "0;JMP"]
+        ...     cpu = CPU(list(parse(source)), idle=idle)
+        ...     cpu.run(max_cycles=25160)
+        ...     return cpu.RAM[16:18].tolist(), cpu.PC, cpu.A, cpu.D
+        >>> run(True) == run(False)
+        True
+
+        Nor does it change how long Sys.wait takes, though most of the
+        wait is skipped:
+
+        >>> import Natives
+        >>> def wait(idle):
+        ...     rom, symbols = read_program("OS/OS.asm")
+        ...     cpu = CPU(rom, jit=True, symbols=symbols, idle=idle)
+        ...     booted = cpu.boot()
+        ...     return Natives.call(cpu, "Sys.wait", [200]).cycles, cpu.skipped
+        >>> (cycles, none), (same, skipped) = wait(False), wait(True)
+        >>> cycles == same, none, skipped > cycles // 2
+        (True, 0, True)
+
+        When the two iterations take different paths, as they do when an
+        inner loop ends, outer is the address where the longer one left
+        the path of the other.
+
+        Returns => (instructions run, instructions skipped, outer)"""
+
+        A0, D0 = self.A, self.D
+        period = clockPeriod - self.iterations % clockPeriod
+
+        first = self.traceloop(min(limit, length, period), stops)
+        ran = len(first)
+
+        if not first or self.PC != first[0][0] or 2 * ran > min(limit, period):
+            return (ran, 0, None)
+
+        A1, D1 = self.A, self.D
+
+        second = self.traceloop(ran, stops)
+        ran += len(second)
+
+        if self.PC != first[0][0]:
+            return (ran, 0, None)
+
+        if [step[0] for step in first] != [step[0] for step in second]:
+            longer = max(first, second, key=len)
+            fork = next(i for i, (one, two) in enumerate(zip(first + [(None,)], second + [(None,)])) if one[0] != two[0])
+            return (ran, 0, longer[fork][0])
+
+        rom = self.ROM
+        count = (limit - ran) // len(first)
+
+        # change of each RAM word per iteration, the last write counts
+
+        changes = {}
+        last = None
+
+        for (pc, r1, read1, write1), (pc2, r2, read2, write2) in zip(first, second):
+
+            if read1 != read2 or write1 != write2:
+                return (ran, 0, None)
+
+            # a loop that reads the clock sees it hold still up to the
+            # next multiple of clockPeriod, one that starts transfers does
+            # more than its changes show
+
+            if read1 is not None and timerRegister <= read1 <= cyclesRegister + 1:
+                count = min(count, (period - ran) // len(first))
+
+            if self.dma is not None and write1 == dmaRegister + 4:
+                return (ran, 0, None)
+
+            if r2 is None:
+                continue
+
+            delta = r2 - r1
+            last = (r2, delta)
+
+            if write2 is not None:
+                changes[write2] = delta
+
+            if not delta:
+                continue
+
+            if rom.comp[pc] in self.BITWISE:
+                return (ran, 0, None)
+
+            # iteration m after this one computes r2 + m * delta, which
+            # must not wrap around, nor change sign if it decides a jump
+
+            if delta > 0:
+                count = min(count, (32767 - r2) // delta)
+                flip = 1 if r2 == 0 else (delta - r2 - 1) // delta if r2 < 0 else None
+            else:
+                count = min(count, (r2 + 32768) // -delta)
+                flip = 1 if r2 == 0 else (r2 - delta - 1) // -delta if r2 > 0 else None
+
+            if rom.jump[pc] not in (0, 7) and flip is not None:
+                count = min(count, flip - 1)
+
+        if count <= 0 or not self.translates(first, second, changes, (A1 - A0, D1 - D0), (self.A - A1, self.D - D1)):
+            return (ran, 0, None)
+
+        for address, delta in changes.items():
+            self.RAM[address] += count * delta
+
+        self.A += count * (self.A - A1)
+        self.D += count * (self.D - D1)
+
+        if last:
+            result = last[0] + count * last[1]
+            self.zr = int(result == 0)
+            self.ng = int(result < 0)
+
+        return (ran, count * len(first), None)
+
+    def translates(self, first, second, changes, entry, end):
+        """Checks that the iteration of a loop traced in second moves all
+        it carries to the next one by a constant, as the one in first
+        moved it to second: the words of RAM by changes (address =>
+        change of their last write), A and D by end, when entry is how
+        they changed from the start of first to the start of second.
+
+        Follows the changes through second (see traceloop()), from those
+        in changes and from no change of the other words of RAM.  Each
+        ALU result must change from first as its inputs make it, no
+        bitwise function may see a changing input and no address or jump
+        target may move.  A loop that doubles a word or adds a counter to
+        a sum fails here, though any two iterations show a change.
+
+        Returns => bool"""
+
+        rom = self.ROM
+
+        dA, dD = entry
+        moved = {}
+        liveA = liveD = setA = setD = False
+
+        for (pc, r1, read, write), (pc2, r2, read2, write2) in zip(first, second):
+
+            if r2 is None:
+                dA, setA = 0, True
+                continue
+
+            comp = rom.comp[pc]
+            mnemonic = compCodes[comp]
+
+            # a register read before the loop sets it carries its value
+            # over from the iteration before
+
+            if not setA and (read is not None or write is not None or rom.jump[pc] or "A" in mnemonic):
+                liveA = True
+
+            if not setD and "D" in mnemonic:
+                liveD = True
+
+            if dA and (read is not None or write is not None or rom.jump[pc]):
+                return False
+
+            dx = moved.get(read, changes.get(read, 0)) if read is not None else dA
+
+            if comp in self.BITWISE:
+                if dx and "A" in mnemonic or dD and "D" in mnemonic:
+                    return False
+                delta = 0
+            else:
+                a, d = self.LINEAR[comp]
+                delta = a * dx + d * dD
+
+            if delta != r2 - r1:
+                return False
+
+            dest = rom.dest[pc]
+
+            if dest & 1:
+                moved[write] = delta
+            if dest & 4:
+                dA, setA = delta, True
+            if dest & 2:
+                dD, setD = delta, True
+
+        return (not liveA or entry[0] == end[0]) and (not liveD or entry[1] == end[1])
+
+    def traceloop(self, limit, stops=()):
+        """Interprets instructions until PC is back where it started, at
+        most limit of them, or until PC reaches an address in stops.
+
+        Returns => [(pc, ALU result, address read, address written), ...]
+                   one per instruction, with None where not applicable"""
+
+        rom = self.ROM
+        RAM = self.RAM
+        ops = self.OPS
+
+        start = pc = self.PC
+        A, D = self.A, self.D
+        result = None
+
+        trace = []
+
+        while len(trace) < limit and pc not in stops:
+
+            word = rom.words[pc]
+
+            if word < 0x8000:
+
+                trace.append((pc, None, None, None))
+                A = word
+                pc += 1
+
+            else:
+
+                read = A if rom.abit[pc] else None
+                result = ops[rom.comp[pc]](A if read is None else RAM[A], D)
+                dest = rom.dest[pc]
+
+                trace.append((pc, result, read, A if dest & 1 else None))
+
+                if rom.jump[pc] & (2 if result == 0 else 4 if result < 0 else 1):
+                    target = A
+                else:
+                    target = pc + 1
+
+                if dest & 1:
+                    RAM[A] = result
+                    if self.dma is not None and A == dmaRegister + 4:
+                        self.dma.go(RAM)
+                if dest & 4:
+                    A = result
+                if dest & 2:
+                    D = result
+
+                pc = target
+
+            if pc == start:
+                break
+
+        self.PC, self.A, self.D = pc, A, D
+
+        if result is not None:
+            self.zr = int(result == 0)
+            self.ng = int(result < 0)
+
+        return trace
+
+    def snapshot(self, filename=None):
+        """Captures PC, A, D, the flags, the instructions retired and all
+        of RAM, including the screen and keyboard, as one blob (see
+        snapshotHeader).  The blob is also written to filename if given.
+
+        Returns => bytearray"""
+
+        memory = memoryview(self.RAM).cast("B")
+
+        blob = bytearray(snapshotHeader.size + len(memory))
+        snapshotHeader.pack_into(blob, 0, b"HACK", self.PC, self.A, self.D, self.zr, self.ng, self.iterations)
+        blob[snapshotHeader.size:] = memory
+
+        if filename:
+            with open(filename, "wb") as outputfile:
+                outputfile.write(blob)
+
+        return blob
+
+    def restore(self, snapshot):
+        """Restores the state captured by snapshot(), from the blob or
+        from the file named by snapshot."""
+
+        if isinstance(snapshot, str):
+            with open(snapshot, "rb") as inputfile:
+                snapshot = inputfile.read()
+
+        memory = memoryview(self.RAM).cast("B")
+
+        if len(snapshot) != snapshotHeader.size + len(memory):
+            raise SnapshotError("snapshot is %i bytes, expected %i" % (len(snapshot), snapshotHeader.size + len(memory)))
+
+        magic, self.PC, self.A, self.D, self.zr, self.ng, self.iterations = snapshotHeader.unpack_from(snapshot)
+
+        if magic != b"HACK":
+            raise SnapshotError("not a snapshot")
+
+        memory[:] = memoryview(snapshot)[snapshotHeader.size:]
+
+        self.event = None
+        self.resume = None
+
+    def record(self, interval=1000000, size=32):
+        """Keeps the last size snapshots, taken every interval instructions
+        or so by run() and the run thread, for rewind().  A size of 0
+        stops recording."""
+
+        if size:
+            self.history = deque(maxlen=size)
+            self.interval = interval
+            self.remember()
+        else:
+            self.history = None
+
+    def remember(self):
+
+        history = self.history
+
+        if not history or self.iterations - history[-1][0] >= self.interval:
+            history.append((self.iterations, self.snapshot()))
+
+    def rewind(self, cycles):
+        """Goes back cycles instructions by restoring the nearest recorded
+        snapshot before then and replaying from it.  The replay is exact
+        as long as input is (see ScriptedKeyboard).
+
+        Returns => RunResult of the replay"""
+
+        history = self.history
+        target = self.iterations - cycles
+
+        # snapshots past the target are taken again by the replay
+
+        while history and history[-1][0] > target:
+            history.pop()
+
+        if not history:
+            raise SnapshotError("no snapshot from %i instructions ago" % cycles)
+
+        self.restore(history[-1][1])
+
+        return self.run(max_cycles=target - self.iterations)
+
+    def boot(self, entry="MAIN.MAIN", cachedir="__jarviscache__", max_cycles=100000000):
+        """Runs the OS initialization in Sys.init up to entry (an address
+        or a label), once per program.  The state there is saved in
+        cachedir under a hash of the ROM, and later boots of the same
+        program restore it instead.
+
+        Returns => RunResult, with reason "cached" when restored"""
+
+        entry = self.address(entry)
+
+        key = hashlib.sha1(self.ROM.words.tobytes())
+        key.update(("%s %i %i %s" % (snapshotHeader.format, ramSize, entry, self.dma is not None)).encode())
+
+        filename = os.path.join(cachedir, "boot_" + key.hexdigest() + ".bin")
+
+        if os.path.exists(filename):
+            started = time.time()
+            self.restore(filename)
+            return RunResult(self.iterations, "cached", self.PC, time.time() - started)
+
+        result = self.run(max_cycles=max_cycles, until_pc=entry)
+
+        if result.reason == "until_pc":
+            os.makedirs(cachedir, exist_ok=True)
+            self.snapshot(filename + ".tmp")
+            os.replace(filename + ".tmp", filename)
+
+        return result
+
+    def compile(self, pc):
+        """Compiles the basic block starting at pc and caches it.
+
+        The block runs until the first jump or up to the next leader.
+
+        Returns => function (see block_source)"""
+
+        rom = self.ROM
+
+        if pc >= len(rom):
+            raise IndexError("PC %i is past the end of ROM" % pc)
+
+        if self.leaders is None:
+            self.leaders = find_leaders(rom)
+
+        end = pc + 1
+
+        while end < len(rom) and end not in self.leaders and not rom.jump[end - 1]:
+            end += 1
+
+        name = "block_%i" % pc
+
+        dma = self.dma is not None
+
+        if self.meters is None:
+            namespace = {}
+            source = block_source(rom, pc, end, name, dma=dma)
+        else:
+            namespace = dict(self.meters)
+            source = block_source(rom, pc, end, name, self.meters["exits"], dma)
+
+            exits = self.meters["EXITS"]
+            exits.extend([0] * (len(self.meters["exits"]) - len(exits)))
+
+        if dma:
+            namespace["DMA"] = self.dma.go
+
+        exec(compile(source, "<%s>" % name, "exec"), namespace)
+
+        block = namespace[name]
+        block.source = source
+
+        self.blocks[pc] = block
+
+        return block
+
+    def stepblock(self):
+        """Executes one compiled basic block.
+
+        Returns => number of instructions executed"""
+
+        block = self.blocks.get(self.PC) or self.compile(self.PC)
+
+        self.PC, self.A, self.D, result, count = block(self.A, self.D, self.RAM)
+
+        if result is not None:
+            self.zr = int(result == 0)
+            self.ng = int(result < 0)
+
+        return count
+
+    def load(self, module):
+        """Seeds the block cache with the regions of a recompiled program,
+        which must be recompiled with dma if the CPU has a DMA controller
+        and without if not."""
+
+        if hasattr(module, "DMA") != (self.dma is not None):
+            raise Error("the program was recompiled %s dma" % ("without" if self.dma else "with"))
+
+        if self.dma is not None:
+            module.DMA = self.dma.go
+
+        blocks = self.blocks if self.meters is None else self.unmetered
+
+        blocks.update(module.ENTRY)
+        blocks.update(self.traps)
+
+ 
+    def step(self):
+
+        rom = self.ROM
+        pc = self.PC
+        word = rom.words[pc]
+
+        if word < 0x8000:
+
+            # A_COMMAND
+
+            self.A = word
+            self.PC = pc + 1
+            return
+
+        # C_COMMAND
+
+        a = self.A
+
+        if rom.abit[pc]:
+            x = self.RAM[a]
+        else:
+            x = a
+
+        result = self.OPS[rom.comp[pc]](x, self.D)
+
+        # cond uses the same bit layout as the jump field
+
+        if result == 0:
+            cond = 2
+        elif result < 0:
+            cond = 4
+        else:
+            cond = 1
+
+        self.zr = cond >> 1 & 1
+        self.ng = cond >> 2
+
+        if rom.jump[pc] & cond:
+            self.PC = a
+        else:
+            self.PC = pc + 1
+
+        dest = rom.dest[pc]
+
+        if dest & 1:
+            self.RAM[a] = result
+            if self.dma is not None and a == dmaRegister + 4:
+                self.dma.go(self.RAM)
+
+        if dest & 4:
+            self.A = result
+
+        if dest & 2:
+            self.D = result
+
+
+class BatchCPU:
+    """n CPUs running the same ROM in lockstep, for running one program
+    on many inputs.  Needs numpy.
+
+    PC, A and D are vectors with one element per instance and RAM is an
+    n x ramSize matrix, so inputs are set up and results read with numpy
+    indexing, e.g. cpu.RAM[:, 0] = range(n).  Each cycle the instances
+    are grouped by PC and every group executes its instruction with the
+    same vector operations (CPU.OPS works on arrays as well as ints).
+    Instances that never diverge are one group, and cost little more
+    than a single CPU."""
+
+    # jump conditions on an array of ALU results, indexed by the jump bits
+
+    JUMPS = tuple(expr and eval("lambda r: " + expr) for expr in jumpSource)
+
+    def __init__(self, program, n):
+
+        # numpy is only needed for batches
+
+        import numpy
+
+        self.numpy = numpy
+        self.n = n
+        self.ROM = decode(program)
+
+        self.rows = numpy.arange(n)
+        self.PC = numpy.zeros(n, numpy.int32)
+        self.A = numpy.zeros(n, numpy.int32)
+        self.D = numpy.zeros(n, numpy.int32)
+        self.RAM = numpy.zeros((n, ramSize), numpy.int16)
+
+        # instructions executed by each instance
+
+        self.cycles = numpy.zeros(n, numpy.int64)
+
+    def clock(self):
+        """Sets the timer and cycle counter registers of every instance
+        from its own cycles, in simulated time (see CPU.clock())"""
+
+        cycles = self.cycles - self.cycles % clockPeriod
+        milliseconds = cycles * 1000 // simulatedHz
+
+        self.RAM[:, timerRegister] = ((milliseconds + 32768) & 65535) - 32768
+        self.RAM[:, cyclesRegister] = ((cycles + 32768) & 65535) - 32768
+        self.RAM[:, cyclesRegister + 1] = (((cycles >> 16) + 32768) & 65535) - 32768
+
+    def reset(self):
+
+        self.PC[:] = 0
+        self.A[:] = 0
+        self.D[:] = 0
+        self.RAM[:] = 0
+        self.cycles[:] = 0
+
+    def groups(self, stops):
+        """Returns => [(pc, index), ...] for every PC an instance is at,
+        index selecting the instances there, leaving out stops"""
+
+        numpy = self.numpy
+        PC = self.PC
+
+        first = int(PC[0])
+
+        if (PC == first).all():
+            return [] if first in stops else [(first, slice(None))]
+
+        order = numpy.argsort(PC, kind="stable")
+        pcs, starts = numpy.unique(PC[order], return_index=True)
+
+        return [(pc, index) for pc, index in zip(pcs.tolist(), numpy.split(order, starts[1:])) if pc not in stops]
+
+    def execute(self, pc, index):
+        """Executes the instruction at pc for the instances in index"""
+
+        rom = self.ROM
+        word = rom.words[pc]
+
+        if word < 0x8000:
+            self.A[index] = word
+            self.PC[index] = pc + 1
+            return
+
+        a = self.A[index]
+        rows = self.rows[index]
+
+        if rom.abit[pc]:
+            x = self.RAM[rows, a].astype(self.numpy.int32)
+        else:
+            x = a
+
+        result = self.numpy.broadcast_to(CPU.OPS[rom.comp[pc]](x, self.D[index]), a.shape)
+
+        jump = rom.jump[pc]
+
+        if jump == 7:
+            self.PC[index] = a
+        elif jump:
+            self.PC[index] = self.numpy.where(self.JUMPS[jump](result), a, pc + 1)
+        else:
+            self.PC[index] = pc + 1
+
+        dest = rom.dest[pc]
+
+        if dest & 1:
+            self.RAM[rows, a] = result
+
+        if dest & 4:
+            self.A[index] = result
+
+        if dest & 2:
+            self.D[index] = result
+
+    def run(self, max_cycles, until_pc=None):
+        """Runs every instance for max_cycles cycles.  Instances that
+        reach an address in until_pc (an address or an iterable) stop
+        there, and the run ends early once all of them have.
+
+        Returns => number of cycles run"""
+
+        if until_pc is None:
+            stops = frozenset()
+        elif isinstance(until_pc, int):
+            stops = frozenset([until_pc])
+        else:
+            stops = frozenset(until_pc)
+
+        # instances still running are all at the latest cycle
+
+        first = int(self.cycles.max())
+
+        for cycle in range(max_cycles):
+
+            if not cycle or not (first + cycle) % clockPeriod:
+                self.clock()
+
+            groups = self.groups(stops)
+
+            if not groups:
+                return cycle
+
+            for pc, index in groups:
+                self.execute(pc, index)
+                self.cycles[index] += 1
+
+        return max_cycles
+
+
+def runprocess(memory, words, jit, source, results, boot=None, idle=False, dma=False):
+    """Body of a CPUProcess worker: runs a CPU on memory until the
+    process is stopped, then sends back its stats()."""
+
+    cpu = CPU(words, jit=jit, device=Remote(), memory=memory, idle=idle, dma=dma)
+
+    if source:
+        cpu.load(recompile(source, dma=dma))
+
+    if boot is not None:
+        cpu.boot(boot)
+
+    cpu.start()
+
+    multiprocessing.current_process().wait()
+
+    cpu.stop()
+
+    results.send(cpu.stats())
+
+
+class CPUProcess:
+    """Runs a CPU in a worker process, so instruction execution gets a
+    core (and a GIL) of its own.
+
+    RAM is a shared array.  The device in this process only reads the
+    screen and writes the keyboard word through SCREEN and KBD, the same
+    way it would for a CPU.  If source is given the worker recompiles it
+    (see recompile()) and runs its blocks.  If boot is given the worker
+    starts from the state at that address (see CPU.boot()), idle turns
+    on skipping idle loops (see CPU.fastforward()) and dma gives the
+    worker a DMA controller."""
+
+    def __init__(self, program, jit=False, device=None, source=None, boot=None, idle=False, dma=False):
+
+        self.memory = RawArray("h", ramSize)
+
+        self.RAM = memoryview(self.memory).cast("B").cast("h")
+        self.SCREEN = self.RAM[16384:24576]
+        self.KBD = self.RAM[24576:24577]
+
+        self.iterations = 0
+        self.hz = 0
+        self.laststats = { "iterations" : 0, "seconds" : 0, "hz" : 0 }
+
+        self.results, results = multiprocessing.Pipe(False)
+
+        words = decode(program).words
+
+        self.mythread = StoppableProcess(target = runprocess, daemon = True,
+                                         args = (self.memory, words, jit, source, results, boot, idle, dma))
+
+        self.IO = device or Headless()
+        self.IO.attach(self)
+
+    def start(self):
+        self.mythread.start()
+
+    def stats(self):
+        """Returns => the worker's CPU.stats() once it has stopped"""
+
+        return self.laststats
+
+    def stop(self):
+
+        self.mythread.stop()
+
+        if self.mythread.is_alive():
+
+            if self.results.poll(10):
+                self.laststats = self.results.recv()
+                self.iterations, self.hz = self.laststats["iterations"], self.laststats["hz"]
+
+            self.mythread.join()
+
+
+if __name__ == "__main__":
+
+    #~  Uncomment this line to play a very slow version of pong
+    inputfile = "Pong.asm"
+
+    #~ inputfile = "OS/OS.asm"
+
+    # Run the CPU in its own process, Tk only draws and reads keys here
+
+    process = True
+
+    # Recompile the program (or load it from the cache) and run it through
+    # the block compiler
+
+    source = open(inputfile).readlines()
+    program = recompile(source)
+
+    # Skip the OS initialization after the first run (see CPU.boot), and
+    # sleep instead of spinning in idle loops
+
+    main = make_symboltable(source)["MAIN.MAIN"]
+
+    if process:
+        c = CPUProcess(program.WORDS, jit=True, device=IO(), source=source, boot=main, idle=True)
+    else:
+        c = CPU(program.WORDS, jit=True, device=IO(), idle=True)
+        c.load(program)
+        c.boot(main)
+
+    c.IO.screen.after(1000, c.start())
+
+    try:
+        c.IO.screen.mainloop()
+    finally:
+        c.stop()
+        print("Total iterations: %i" % c.iterations)
+        print("Average Hz: %i" % c.hz)
 
 #####
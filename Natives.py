@@ -0,0 +1,640 @@
+"""Native versions of hot OS routines, run in place of the compiled Jack
+code through CPU.trap().
+
+Math.multiply is a 16 iteration shift-add loop that calls Math.bit each
+time round, and every * in a Jack program calls it.  Each routine here
+follows the Jack version in OS/ step by step, 16 bit wraparound, the
+comparisons of the VM (x < y is x - y < 0) and static side effects (the
+divHelper of Math.divide) included, so a trapped run leaves the machine
+in the same state as the Jack code would.  A routine declines whenever
+the Jack version would report an error, never return, or touch memory
+outside RAM.  verify() checks one against the other.
+
+    cpu = Jarvis.CPU(rom, jit=True, symbols=symbols)
+    cpu.boot()
+    Natives.install(cpu, Jarvis.make_variabletable(lines))
+
+Usage: python3 Natives.py [-n cases] [program.asm]
+"""
+
+import sys, time, random, argparse
+from collections import namedtuple
+
+import Jarvis
+
+# instructions charged for each trap: about what the Jack version takes
+# on average, the (call) and (return) routines not included
+
+COSTS = { "Math.multiply"    : 6500,
+          "Math.divide"      : 1900,
+          "Math.sqrt"        : 54000,
+          "Memory.alloc"     : 300,
+          "Screen.drawHoriz" : 265000,
+          "Output.printChar" : 186000 }
+
+# the static variables of each class, in the order they are declared
+
+STATICS = { "Math"   : ("twoToThe", "intSize", "sqrtHelper", "divHelper"),
+            "Memory" : ("heapStart", "heapEnd", "freeList", "zeroBlock"),
+            "Screen" : ("color", "width", "height", "screenStart"),
+            "Output" : ("charMaps", "cursorY", "cursorX") }
+
+def wrap(value):
+    """Wraps an integer to a signed 16 bit word
+
+    >>> wrap(32768), wrap(-32769), wrap(300 * 300)
+    (-32768, 32767, 24464)
+
+    Returns => int"""
+
+    return (value + 32768 & 65535) - 32768
+
+def lt(x, y):
+    """x < y the way the VM computes it, as x - y < 0
+
+    >>> lt(1, 2), lt(-32768, 1)
+    (True, False)
+
+    Returns => bool"""
+
+    return wrap(x - y) < 0
+
+def gt(x, y):
+    """x > y the way the VM computes it, as x - y > 0"""
+
+    return wrap(x - y) > 0
+
+def find_statics(variables):
+    """Looks up the static variables of the OS classes, which the VM
+    translator numbers across the whole program (Math.static.4 and on).
+    variables is the program's variable table (see make_variabletable).
+
+    Returns => dict of class name => dict of variable name => address,
+               for the classes whose statics are all in variables"""
+
+    numbers = {}
+
+    for name, address in variables.items():
+        parts = name.split(".")
+        if len(parts) == 3 and parts[1] == "STATIC" and parts[2].isdigit():
+            numbers.setdefault(parts[0], []).append((int(parts[2]), address))
+
+    statics = {}
+
+    for classname, names in STATICS.items():
+        found = sorted(numbers.get(classname.upper(), ()))
+        if len(found) == len(names):
+            statics[classname] = dict(zip(names, (address for number, address in found)))
+
+    return statics
+
+class Decline(Exception):
+    """Raised inside a native routine that leaves the call to the Jack
+    version."""
+    pass
+
+
+class OS:
+    """Native routines for the OS of one program, working on the statics
+    found in its variable table.
+
+    Each routine is called with RAM and the arguments of the call, and
+    returns the value the Jack version returns or None when it declines.
+    A void function without a return statement returns whatever is on
+    top of its stack frame: its last local variable, or the THAT it
+    saved if it has none."""
+
+    def __init__(self, symbols, variables):
+
+        self.statics = find_statics(variables)
+
+        self.routines = {}
+
+        for name in COSTS:
+            classname, function = name.split(".")
+            if classname in self.statics and name.upper() in symbols:
+                self.routines[name] = getattr(self, function)
+
+    def static(self, classname, name):
+        return self.statics[classname][name]
+
+    # helpers that do what a call to the Jack function does, raising
+    # Decline instead of an error
+
+    def _multiply(self, RAM, x, y):
+
+        if RAM[self.static("Math", "intSize")] != 16:
+            raise Decline()
+
+        return wrap(x * y)
+
+    def _divide(self, RAM, x, y):
+
+        if y == 0:
+            raise Decline()
+
+        sign = (x ^ y) < 0
+
+        x = wrap(-x) if x < 0 else x
+        y = wrap(-y) if y < 0 else y
+
+        q = self._subdivide(RAM, x, y)
+
+        return wrap(-q) if sign else q
+
+    def _subdivide(self, RAM, x, y):
+
+        helper = self.static("Math", "divHelper")
+
+        if gt(y, x) or lt(y, 0):
+            RAM[helper] = 0
+            return 0
+
+        q = self._subdivide(RAM, x, wrap(y + y))
+
+        if lt(wrap(x - RAM[helper]), y):
+            return wrap(q + q)
+
+        RAM[helper] = wrap(RAM[helper] + y)
+
+        return wrap(q + q + 1)
+
+    def _mod(self, RAM, n, base):
+        return wrap(n - self._multiply(RAM, self._divide(RAM, n, base), base))
+
+    def _twoToThe(self, RAM, x):
+        return read(RAM, RAM[self.static("Math", "twoToThe")] + x)
+
+    def _drawPixel(self, RAM, x, y):
+
+        memloc = wrap(self._divide(RAM, x, 16) + self._multiply(RAM, y, 32))
+        m = self._twoToThe(RAM, self._mod(RAM, x, 16))
+
+        self._plot(RAM, memloc, m)
+
+    def _plot(self, RAM, memloc, m):
+
+        address = wrap(RAM[self.static("Screen", "screenStart")] + memloc)
+        color = RAM[self.static("Screen", "color")]
+
+        RAM[address] = (RAM[address] & ~m) | (color & m)
+
+    # the trapped routines
+
+    def multiply(self, RAM, x, y):
+
+        try:
+            return self._multiply(RAM, x, y)
+        except Decline:
+            return None
+
+    def divide(self, RAM, x, y):
+
+        try:
+            return self._divide(RAM, x, y)
+        except Decline:
+            return None
+
+    def sqrt(self, RAM, x):
+
+        j = RAM[self.static("Math", "sqrtHelper")]
+        y = 0
+
+        if not 0 <= j < 16:
+            return None
+
+        try:
+            while gt(j, 0) or j == 0:
+
+                t = wrap(y + self._twoToThe(RAM, j))
+                tt = self._multiply(RAM, t, t)
+
+                if (lt(tt, x) or tt == x) and gt(tt, 0):
+                    y = t
+
+                j = wrap(j - 1)
+
+        except Decline:
+            return None
+
+        return y
+
+    def alloc(self, RAM, size):
+
+        if lt(size, 0) or size == 0:
+            return RAM[self.static("Memory", "zeroBlock")]
+
+        block = RAM[self.static("Memory", "freeList")]
+        lastBlock = block
+
+        # first fit, only the last step writes anything.  A free list
+        # with a cycle in it never ends, in Jack too.
+
+        try:
+            for i in range(16384):
+
+                if block == 0:
+                    break
+
+                blockSize = read(RAM, block - 1)
+
+                if blockSize == size:
+                    write(RAM, lastBlock, block)
+                    return block
+
+                if gt(blockSize, size):
+                    blockSlice = wrap(wrap(wrap(block + blockSize) - size) - 1)
+                    check(blockSlice - 1)
+                    write(RAM, blockSlice - 1, size)
+                    write(RAM, block - 1, wrap(wrap(blockSize - size) - 1))
+                    return blockSlice
+
+                lastBlock = block
+                block = read(RAM, block + 1)
+
+        except Decline:
+            return None
+
+        # Memory.defrag() reports a heap overflow
+
+        return None
+
+    def drawHoriz(self, RAM, x1, x2, y):
+
+        # within the screen every address drawn to is; x1 == x2 recurses
+        # forever
+
+        if not (0 <= x1 < 512 and 0 <= x2 < 512 and 0 <= y < 256 and x1 != x2):
+            return None
+
+        if RAM[self.static("Screen", "screenStart")] != 16384:
+            return None
+
+        # y32 is the last local variable, it stays 0 in a call that only
+        # calls drawHoriz(x2, x1, y)
+
+        y32 = 0
+        swapped = x2 < x1
+
+        try:
+            if swapped:
+                x1, x2 = x2, x1
+
+            dx = x2 - x1
+
+            if dx > 16:
+
+                # align to the first word boundary
+
+                mod = 16 - self._mod(RAM, x1, 16)
+                y32 = self._multiply(RAM, y, 32)
+
+                while gt(mod, 0):
+                    memloc = wrap(self._divide(RAM, x1 + mod, 16) + y32)
+                    m = self._twoToThe(RAM, self._mod(RAM, x1 + mod, 16))
+                    self._plot(RAM, memloc, m)
+                    mod -= 1
+
+                x1 = x1 + (16 - self._mod(RAM, x1, 16))
+
+                # align to the second
+
+                mod = self._mod(RAM, x2, 16)
+
+                while gt(mod, 0):
+                    memloc = wrap(self._divide(RAM, x2 - mod, 16) + y32)
+                    m = self._twoToThe(RAM, self._mod(RAM, x2 - mod, 16))
+                    self._plot(RAM, memloc, m)
+                    mod -= 1
+
+                x2 = x2 - self._mod(RAM, x2, 16)
+
+                # whole words in between, with one Memory.fill
+
+                color = RAM[self.static("Screen", "color")]
+                start = RAM[self.static("Screen", "screenStart")]
+
+                address = wrap(start + self._divide(RAM, x1, 16) + y32)
+                length = self._divide(RAM, x2 - x1, 16)
+
+                # it asks the controller first, which takes a request
+                # within the screen, and machines without one read back
+                # the command
+
+                go = -1 if RAM[Jarvis.dmaRegister + 4] < 0 else 2
+
+                for i, value in enumerate((0, address, length, color, go)):
+                    RAM[Jarvis.dmaRegister + i] = value
+
+                for i in range(length):
+                    write(RAM, address + i, color)
+
+            else:
+                while gt(dx, 0):
+                    self._drawPixel(RAM, x1 + dx, y)
+                    dx -= 1
+
+        except Decline:
+            return None
+
+        return 0 if swapped else y32
+
+    def printChar(self, RAM, c):
+
+        that = RAM[4]
+        cursorX = self.static("Output", "cursorX")
+        cursorY = self.static("Output", "cursorY")
+
+        if not (0 <= RAM[cursorX] and 0 <= RAM[cursorY] < 23):
+            return None
+
+        # the character map must be readable before anything is drawn
+
+        if lt(c, 32) or gt(c, 126):
+            c = 0
+
+        try:
+            printme = read(RAM, RAM[self.static("Output", "charMaps")] + c)
+            check(printme)
+            check(printme + 9)
+
+            if lt(RAM[cursorX], 64):
+                self._print(RAM, printme)
+                RAM[cursorX] = wrap(RAM[cursorX] + 1)
+            else:
+                RAM[cursorX] = 0
+                RAM[cursorY] = 0
+                self._print(RAM, printme)
+                RAM[cursorX] = 1
+
+        except Decline:
+            return None
+
+        return that
+
+    def _print(self, RAM, printme):
+
+        startX = self._multiply(RAM, RAM[self.static("Output", "cursorX")], 8)
+        startY = self._multiply(RAM, RAM[self.static("Output", "cursorY")], 11)
+
+        stopX = startX + 7
+        stopY = startY + 10
+
+        y = 0
+        y32 = self._multiply(RAM, startY, 32)
+
+        while lt(startY + y, stopY):
+
+            x = 0
+            printmeY = RAM[printme + y]
+            sxDiv16 = self._divide(RAM, startX, 16)
+
+            m = self._twoToThe(RAM, self._mod(RAM, startX, 16))
+
+            while lt(startX + x, stopX):
+
+                memloc = sxDiv16 + y32
+                color = -1 if printmeY & self._twoToThe(RAM, x) else 0
+
+                RAM[16384 + memloc] = (RAM[16384 + memloc] & ~m) | (color & m)
+
+                m = wrap(m + m)
+
+                if lt(m, 0):
+                    m = 1
+                    sxDiv16 += 1
+
+                x += 1
+
+            y += 1
+            y32 += 32
+
+def check(address):
+
+    if not 0 <= address < Jarvis.ramSize:
+        raise Decline()
+
+def read(RAM, address):
+
+    check(address)
+
+    return RAM[address]
+
+def write(RAM, address, value):
+
+    check(address)
+
+    RAM[address] = value
+
+
+def install(cpu, variables, costs=None, names=None):
+    """Traps the OS routines named in names (all of COSTS by default) that
+    the program on cpu has.  cpu needs the program's symbols, variables is
+    its variable table (see make_variabletable).  costs overrides the
+    instructions charged for each (see COSTS).
+
+    The routines follow the OS in OS/ built by VirtualMachine, whose
+    statics are Class.static.n.  The book's own OS keeps other statics
+    (Class.n from its translator) and works differently, so programs
+    built with it like Pong.asm get none.
+
+    >>> rom, symbols = Jarvis.read_program("Pong.asm")
+    >>> with open("Pong.asm") as inputfile:
+    ...     install(Jarvis.CPU(rom, symbols=symbols), Jarvis.make_variabletable(inputfile.readlines()))
+    []
+
+    Returns => list of the names trapped"""
+
+    native = OS(cpu.symbols, variables)
+    costs = dict(COSTS, **(costs or {}))
+
+    trapped = []
+
+    for name, routine in native.routines.items():
+        if names is None or name in names:
+            nargs = routine.__code__.co_argcount - 2
+            cpu.trap(name, routine, nargs, costs[name])
+            trapped.append(name)
+
+    return trapped
+
+# what verify() returns.  failures lists the arguments of the calls that
+# left the machine in a different state or never ran the native routine,
+# cycles and trapcycles are the instructions each version took in total,
+# calls included.
+
+Verification = namedtuple("Verification", ("name", "calls", "failures", "cycles", "trapcycles"))
+
+def call(cpu, name, args, max_cycles=10000000):
+    """Calls the VM function name from the (call) routine with args on the
+    stack, and runs until it returns.
+
+    Returns => RunResult"""
+
+    RAM = cpu.RAM
+    sp = RAM[0]
+
+    for i, value in enumerate(args):
+        RAM[sp + i] = value
+
+    RAM[0] = sp + len(args)
+    RAM[14] = len(args)
+    RAM[15] = cpu.address(name)
+
+    # return to the address past the end of ROM, which is never run
+
+    cpu.D = len(cpu.ROM)
+    cpu.PC = cpu.symbols["CALL"]
+
+    return cpu.run(max_cycles=max_cycles, until_pc=len(cpu.ROM))
+
+def pop(cpu):
+    """Pops the return value a call leaves on the stack.
+
+    Returns => int"""
+
+    cpu.RAM[0] -= 1
+
+    return cpu.RAM[cpu.RAM[0]]
+
+def state(cpu):
+    """Returns => what a call leaves behind: the registers, the pointers,
+    R14 and R15, the statics and the stack below SP, the heap, the
+    screen and the keyboard, and the DMA registers.  Temp, R13 and the
+    stack above SP hold scratch values, and the clock registers tell how
+    long a call took."""
+
+    RAM = cpu.RAM
+
+    return (cpu.PC, cpu.A, cpu.D, RAM[:5].tolist(), RAM[14:RAM[0]].tolist(), RAM[2048:Jarvis.timerRegister].tolist(),
+            RAM[Jarvis.dmaRegister:Jarvis.dmaRegister + 5].tolist())
+
+def verify(cpu, variables, name, cases):
+    """Calls name on cpu for each tuple of arguments in cases, once
+    running the Jack version and once the native routine, and compares
+    the states they leave behind.  Each call starts where the previous
+    one left off.  A call the native routine was never called for, so
+    that the Jack version ran both times, fails too.  cpu must be in jit
+    mode, with the OS initialized (see CPU.boot()).
+
+    >>> with open("OS/OS.asm") as inputfile:
+    ...     variables = Jarvis.make_variabletable(inputfile.readlines())
+    >>> rom, symbols = Jarvis.read_program("OS/OS.asm")
+    >>> cpu = Jarvis.CPU(rom, jit=True, symbols=symbols)
+    >>> booted = cpu.boot()
+    >>> rng = random.Random(0)
+    >>> [(name, len(verify(cpu, variables, name, random_cases(name, 10, rng)).failures))
+    ...  for name in OS(symbols, variables).routines]
+    [('Math.multiply', 0), ('Math.divide', 0), ('Math.sqrt', 0), ('Memory.alloc', 0), ('Screen.drawHoriz', 0), ('Output.printChar', 0)]
+
+    Returns => Verification"""
+
+    native = OS(cpu.symbols, variables)
+
+    if name not in native.routines:
+        raise Jarvis.Error("%s has no native routine for this program" % name)
+
+    routine = native.routines[name]
+    nargs = routine.__code__.co_argcount - 2
+
+    called = []
+
+    def counted(RAM, *args):
+        called.append(args)
+        return routine(RAM, *args)
+
+    failures = []
+    cycles = trapcycles = 0
+
+    for args in cases:
+
+        before = cpu.snapshot()
+
+        cycles += call(cpu, name, args).cycles
+        expected = state(cpu)
+
+        cpu.restore(before)
+        cpu.trap(name, counted, nargs, COSTS[name])
+        del called[:]
+
+        try:
+            trapcycles += call(cpu, name, args).cycles
+        finally:
+            cpu.trap(name, None)
+
+        if state(cpu) != expected or not called:
+            failures.append(tuple(args))
+
+        pop(cpu)
+
+    return Verification(name, len(cases), failures, cycles, trapcycles)
+
+def random_cases(name, n, rng=random):
+    """Returns => n tuples of arguments for name, edge cases first"""
+
+    def word():
+        return rng.choice((rng.randint(-32768, 32767), rng.randint(-300, 300)))
+
+    if name == "Math.multiply":
+        cases = [(0, 0), (-1, -1), (-32768, -1), (181, 181), (32767, 2)]
+        cases += [(word(), word()) for i in range(n)]
+    elif name == "Math.divide":
+        cases = [(-32768, -1), (-32768, 1), (32767, -32768), (7, 2), (-7, 2)]
+        cases += [(word(), word() or 1) for i in range(n)]
+    elif name == "Math.sqrt":
+        cases = [(0,), (1,), (-1,), (32767,), (-32768,), (16384,)]
+        cases += [(word(),) for i in range(n)]
+    elif name == "Memory.alloc":
+        cases = [(0,), (-1,), (1,)]
+        cases += [(rng.randint(0, 40),) for i in range(n)]
+    elif name == "Screen.drawHoriz":
+        # x1 == x2 never returns
+
+        cases = [(0, 511, 0), (511, 0, 255), (3, 18, 7), (6, 5, 5), (17, 3, 100)]
+        for i in range(n):
+            x1, x2 = rng.sample(range(512), 2)
+            cases.append((x1, x2, rng.randint(0, 255)))
+    elif name == "Output.printChar":
+        cases = [(65,), (31,), (127,), (-32768,)]
+        cases += [(rng.randint(20, 130),) for i in range(n)]
+    else:
+        cases = []
+
+    return cases[:n]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Check the native OS routines against the Jack ones.")
+    parser.add_argument("program", nargs="?", default="OS/OS.asm", help=".asm file with the OS compiled in")
+    parser.add_argument("-n", "--cases", type=int, default=100, help="calls per routine")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+
+    args = parser.parse_args()
+
+    with open(args.program) as inputfile:
+        lines = inputfile.readlines()
+
+    rom, symbols = Jarvis.read_program(args.program)
+    variables = Jarvis.make_variabletable(lines)
+
+    cpu = Jarvis.CPU(rom, jit=True, symbols=symbols)
+    cpu.boot()
+
+    rng = random.Random(args.seed)
+    failed = 0
+
+    for name in OS(symbols, variables).routines:
+
+        started = time.time()
+        result = verify(cpu, variables, name, random_cases(name, args.cases, rng))
+
+        print("%-18s %4i calls %4i failed  %12i cycles  %12i trapped  %8.3fs" %
+              (name, result.calls, len(result.failures), result.cycles, result.trapcycles, time.time() - started))
+
+        for failure in result.failures[:5]:
+            print("    %s%r" % (name, failure))
+
+        failed += len(result.failures)
+
+    sys.exit(1 if failed else 0)
@@ -25902,6 +25902,1076 @@ M=D
 // return
 @return
 0;JMP
+// function Memory.copy nLocals: 0
+(Memory.copy)
+// push constant 1
+@1
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// push argument 0
+@0
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push argument 1
+@1
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push argument 2
+@2
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 0
+@0
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// call Memory._transfer nArgs: 5
+@5
+D=A
+@R14
+M=D
+@Memory._transfer
+D=A
+@R15
+M=D
+@Memory.copy.call.0
+D=A
+@call
+0;JMP
+(Memory.copy.call.0)
+// pop temp 0
+@SP
+AM=M-1
+D=M
+@R5
+M=D
+// return
+@return
+0;JMP
+// function Memory.fill nLocals: 0
+(Memory.fill)
+// push constant 2
+@2
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 0
+@0
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// push argument 0
+@0
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push argument 1
+@1
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push argument 2
+@2
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// call Memory._transfer nArgs: 5
+@5
+D=A
+@R14
+M=D
+@Memory._transfer
+D=A
+@R15
+M=D
+@Memory.fill.call.0
+D=A
+@call
+0;JMP
+(Memory.fill.call.0)
+// pop temp 0
+@SP
+AM=M-1
+D=M
+@R5
+M=D
+// return
+@return
+0;JMP
+// function Memory._transfer nLocals: 3
+(Memory._transfer)
+@SP
+AM=M+1
+A=A-1
+M=0
+@SP
+AM=M+1
+A=A-1
+M=0
+@SP
+AM=M+1
+A=A-1
+M=0
+// push constant 24580
+@24580
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// pop local 0
+@SP
+AM=M-1
+D=M
+@LCL
+A=M
+M=D
+// push local 0
+@0
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 0
+@0
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push argument 1
+@1
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop that 0
+@SP
+AM=M-1
+D=M
+@THAT
+A=M
+M=D
+// push local 0
+@0
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 1
+@1
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push argument 2
+@2
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop that 0
+@SP
+AM=M-1
+D=M
+@THAT
+A=M
+M=D
+// push local 0
+@0
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 2
+@2
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push argument 3
+@3
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop that 0
+@SP
+AM=M-1
+D=M
+@THAT
+A=M
+M=D
+// push local 0
+@0
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 3
+@3
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push argument 4
+@4
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop that 0
+@SP
+AM=M-1
+D=M
+@THAT
+A=M
+M=D
+// push local 0
+@0
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 4
+@4
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push argument 0
+@0
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop that 0
+@SP
+AM=M-1
+D=M
+@THAT
+A=M
+M=D
+// push pointer 1
+@4
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push local 0
+@0
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 4
+@4
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push that 0
+@0
+D=A
+@THAT
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop temp 2
+@SP
+AM=M-1
+D=M
+@R7
+M=D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push temp 2
+@7
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 1
+@1
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// neg
+@SP
+A=M-1
+M=-M
+// eq
+@Memory._transfer.eq.0
+D=A
+@R14
+M=D
+@eq
+0;JMP
+(Memory._transfer.eq.0)
+// pop temp 1
+@SP
+AM=M-1
+D=M
+@R6
+M=D
+// push temp 1
+@6
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push temp 1
+@6
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// not
+@SP
+A=M-1
+M=!M
+// if-goto Memory._transfer.if.0
+@SP
+AM=M-1
+D=M
+@Memory._transfer.if.0
+D;JNE
+// push constant 0
+@0
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// return
+@return
+0;JMP
+(Memory._transfer.if.0)
+// pop temp 1
+@SP
+AM=M-1
+D=M
+@R6
+M=D
+// push argument 0
+@0
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 2
+@2
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// eq
+@Memory._transfer.eq.1
+D=A
+@R14
+M=D
+@eq
+0;JMP
+(Memory._transfer.eq.1)
+// pop temp 1
+@SP
+AM=M-1
+D=M
+@R6
+M=D
+// push temp 1
+@6
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push temp 1
+@6
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// not
+@SP
+A=M-1
+M=!M
+// if-goto Memory._transfer.if.1
+@SP
+AM=M-1
+D=M
+@Memory._transfer.if.1
+D;JNE
+(Memory._transfer.while.0)
+// push argument 3
+@3
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 0
+@0
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// gt
+@Memory._transfer.gt.0
+D=A
+@R14
+M=D
+@gt
+0;JMP
+(Memory._transfer.gt.0)
+// not
+@SP
+A=M-1
+M=!M
+// if-goto Memory._transfer.while.1
+@SP
+AM=M-1
+D=M
+@Memory._transfer.while.1
+D;JNE
+// push argument 3
+@3
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 1
+@1
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// sub
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M-D
+// pop argument 3
+@SP
+AM=M-1
+D=M
+@ARG
+A=M
+A=A+1
+A=A+1
+A=A+1
+M=D
+// push argument 2
+@2
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push argument 3
+@3
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push argument 4
+@4
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop that 0
+@SP
+AM=M-1
+D=M
+@THAT
+A=M
+M=D
+// goto Memory._transfer.while.0
+@Memory._transfer.while.0
+0;JMP
+(Memory._transfer.while.1)
+// push constant 0
+@0
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// return
+@return
+0;JMP
+(Memory._transfer.if.1)
+// pop temp 1
+@SP
+AM=M-1
+D=M
+@R6
+M=D
+// push constant 1
+@1
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// pop local 2
+@SP
+AM=M-1
+D=M
+@LCL
+A=M
+A=A+1
+A=A+1
+M=D
+// push argument 1
+@1
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push argument 2
+@2
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// lt
+@Memory._transfer.lt.0
+D=A
+@R14
+M=D
+@lt
+0;JMP
+(Memory._transfer.lt.0)
+// pop temp 1
+@SP
+AM=M-1
+D=M
+@R6
+M=D
+// push temp 1
+@6
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push temp 1
+@6
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// not
+@SP
+A=M-1
+M=!M
+// if-goto Memory._transfer.if.2
+@SP
+AM=M-1
+D=M
+@Memory._transfer.if.2
+D;JNE
+// push constant 1
+@1
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// neg
+@SP
+A=M-1
+M=-M
+// pop local 2
+@SP
+AM=M-1
+D=M
+@LCL
+A=M
+A=A+1
+A=A+1
+M=D
+// push argument 3
+@3
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 1
+@1
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// sub
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M-D
+// pop local 1
+@SP
+AM=M-1
+D=M
+@LCL
+A=M
+A=A+1
+M=D
+(Memory._transfer.if.2)
+// pop temp 1
+@SP
+AM=M-1
+D=M
+@R6
+M=D
+(Memory._transfer.while.2)
+// push argument 3
+@3
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 0
+@0
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// gt
+@Memory._transfer.gt.1
+D=A
+@R14
+M=D
+@gt
+0;JMP
+(Memory._transfer.gt.1)
+// not
+@SP
+A=M-1
+M=!M
+// if-goto Memory._transfer.while.3
+@SP
+AM=M-1
+D=M
+@Memory._transfer.while.3
+D;JNE
+// push argument 2
+@2
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push local 1
+@1
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push pointer 1
+@4
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push argument 1
+@1
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push local 1
+@1
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push that 0
+@0
+D=A
+@THAT
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop temp 2
+@SP
+AM=M-1
+D=M
+@R7
+M=D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push temp 2
+@7
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop that 0
+@SP
+AM=M-1
+D=M
+@THAT
+A=M
+M=D
+// push local 1
+@1
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push local 2
+@2
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// add
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// pop local 1
+@SP
+AM=M-1
+D=M
+@LCL
+A=M
+A=A+1
+M=D
+// push argument 3
+@3
+D=A
+@ARG
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push constant 1
+@1
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
+// sub
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M-D
+// pop argument 3
+@SP
+AM=M-1
+D=M
+@ARG
+A=M
+A=A+1
+A=A+1
+A=A+1
+M=D
+// goto Memory._transfer.while.2
+@Memory._transfer.while.2
+0;JMP
+(Memory._transfer.while.3)
+// return
+@return
+0;JMP
 // {line: 20271}
 // function Memory.alloc nLocals: 5
 (Memory.alloc)
@@ -27281,13 +28351,8 @@ M=D
 @return
 0;JMP
 // {line: 21306}
-// function String.new nLocals: 1
+// function String.new nLocals: 0
 (String.new)
-@SP
-AM=M+1
-A=A-1
-M=0
-// {line: 21312}
 // push constant 3
 @3
 D=A
@@ -27295,7 +28360,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 21325}
 // call Memory.alloc nArgs: 1
 @1
 D=A
@@ -27310,14 +28374,12 @@ D=A
 @call
 0;JMP
 (String.new.call.0)
-// {line: 21330}
 // pop pointer 0
 @SP
 AM=M-1
 D=M
 @THIS
 M=D
-// {line: 21339}
 // push argument 0
 @0
 D=A
@@ -27328,7 +28390,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 21345}
 // push constant 0
 @0
 D=A
@@ -27336,7 +28397,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 21352}
 // lt
 @String.new.lt.0
 D=A
@@ -27345,14 +28405,12 @@ M=D
 @lt
 0;JMP
 (String.new.lt.0)
-// {line: 21357}
 // pop temp 1
 @SP
 AM=M-1
 D=M
 @R6
 M=D
-// {line: 21363}
 // push temp 1
 @6
 D=M
@@ -27360,7 +28418,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 21369}
 // push temp 1
 @6
 D=M
@@ -27368,19 +28425,16 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 21372}
 // not
 @SP
 A=M-1
 M=!M
-// {line: 21377}
 // if-goto String.new.if.0
 @SP
 AM=M-1
 D=M
 @String.new.if.0
 D;JNE
-// {line: 21383}
 // push constant 1
 @1
 D=A
@@ -27388,7 +28442,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 21389}
 // pop argument 0
 @SP
 AM=M-1
@@ -27396,16 +28449,13 @@ D=M
 @ARG
 A=M
 M=D
-// {line: 21390}
 (String.new.if.0)
-// {line: 21395}
 // pop temp 1
 @SP
 AM=M-1
 D=M
 @R6
 M=D
-// {line: 21401}
 // push constant 0
 @0
 D=A
@@ -27413,7 +28463,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 21409}
 // pop this 2
 @SP
 AM=M-1
@@ -27423,7 +28472,6 @@ A=M
 A=A+1
 A=A+1
 M=D
-// {line: 21418}
 // push argument 0
 @0
 D=A
@@ -27434,7 +28482,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 21425}
 // pop this 1
 @SP
 AM=M-1
@@ -27443,7 +28490,6 @@ D=M
 A=M
 A=A+1
 M=D
-// {line: 21434}
 // push argument 0
 @0
 D=A
@@ -27454,7 +28500,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 21447}
 // call Array.new nArgs: 1
 @1
 D=A
@@ -27469,7 +28514,6 @@ D=A
 @call
 0;JMP
 (String.new.call.1)
-// {line: 21453}
 // pop this 0
 @SP
 AM=M-1
@@ -27477,68 +28521,6 @@ D=M
 @THIS
 A=M
 M=D
-// {line: 21459}
-// push constant 0
-@0
-D=A
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 21465}
-// pop local 0
-@SP
-AM=M-1
-D=M
-@LCL
-A=M
-M=D
-// {line: 21466}
-(String.new.while.0)
-// {line: 21475}
-// push local 0
-@0
-D=A
-@LCL
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 21484}
-// push argument 0
-@0
-D=A
-@ARG
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 21491}
-// lt
-@String.new.lt.1
-D=A
-@R14
-M=D
-@lt
-0;JMP
-(String.new.lt.1)
-// {line: 21494}
-// not
-@SP
-A=M-1
-M=!M
-// {line: 21499}
-// if-goto String.new.while.1
-@SP
-AM=M-1
-D=M
-@String.new.while.1
-D;JNE
-// {line: 21508}
 // push this 0
 @0
 D=A
@@ -27547,90 +28529,45 @@ A=M+D
 D=M
 @SP
 M=M+1
-A=M-1
-M=D
-// {line: 21517}
-// push local 0
-@0
-D=A
-@LCL
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 21522}
-// add
-@SP
-AM=M-1
-D=M
-A=A-1
-M=M+D
-// {line: 21527}
-// pop pointer 1
-@SP
-AM=M-1
-D=M
-@THAT
-M=D
-// {line: 21533}
-// push constant 32
-@32
-D=A
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 21539}
-// pop that 0
-@SP
-AM=M-1
-D=M
-@THAT
-A=M
+A=M-1
 M=D
-// {line: 21548}
-// push local 0
+// push argument 0
 @0
 D=A
-@LCL
+@ARG
 A=M+D
 D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 21554}
-// push constant 1
-@1
+// push constant 32
+@32
 D=A
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 21559}
-// add
-@SP
-AM=M-1
-D=M
-A=A-1
-M=M+D
-// {line: 21565}
-// pop local 0
+// call Memory.fill nArgs: 3
+@3
+D=A
+@R14
+M=D
+@Memory.fill
+D=A
+@R15
+M=D
+@String.new.call.2
+D=A
+@call
+0;JMP
+(String.new.call.2)
+// pop temp 0
 @SP
 AM=M-1
 D=M
-@LCL
-A=M
+@R5
 M=D
-// {line: 21567}
-// goto String.new.while.0
-@String.new.while.0
-0;JMP
-// {line: 21568}
-(String.new.while.1)
-// {line: 21574}
 // push pointer 0
 @3
 D=M
@@ -27638,7 +28575,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 21576}
 // return
 @return
 0;JMP
@@ -29591,7 +30527,7 @@ M=D
 @return
 0;JMP
 // {line: 23094}
-// function String.grow nLocals: 3
+// function String.grow nLocals: 2
 (String.grow)
 @SP
 AM=M+1
@@ -29601,11 +30537,6 @@ M=0
 AM=M+1
 A=A-1
 M=0
-@SP
-AM=M+1
-A=A-1
-M=0
-// {line: 23103}
 // push argument 0
 @0
 D=A
@@ -29616,14 +30547,12 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 23108}
 // pop pointer 0
 @SP
 AM=M-1
 D=M
 @THIS
 M=D
-// {line: 23117}
 // push this 1
 @1
 D=A
@@ -29634,7 +30563,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 23123}
 // push constant 1
 @1
 D=A
@@ -29642,14 +30570,12 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 23128}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 23141}
 // call Array.new nArgs: 1
 @1
 D=A
@@ -29664,24 +30590,6 @@ D=A
 @call
 0;JMP
 (String.grow.call.0)
-// {line: 23148}
-// pop local 1
-@SP
-AM=M-1
-D=M
-@LCL
-A=M
-A=A+1
-M=D
-// {line: 23154}
-// push constant 0
-@0
-D=A
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 23160}
 // pop local 0
 @SP
 AM=M-1
@@ -29689,23 +30597,9 @@ D=M
 @LCL
 A=M
 M=D
-// {line: 23161}
-(String.grow.while.0)
-// {line: 23170}
-// push local 0
+// push this 0
 @0
 D=A
-@LCL
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 23179}
-// push this 1
-@1
-D=A
 @THIS
 A=M+D
 D=M
@@ -29713,39 +30607,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 23186}
-// lt
-@String.grow.lt.0
-D=A
-@R14
-M=D
-@lt
-0;JMP
-(String.grow.lt.0)
-// {line: 23189}
-// not
-@SP
-A=M-1
-M=!M
-// {line: 23194}
-// if-goto String.grow.while.1
-@SP
-AM=M-1
-D=M
-@String.grow.while.1
-D;JNE
-// {line: 23203}
-// push local 1
-@1
-D=A
-@LCL
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 23212}
 // push local 0
 @0
 D=A
@@ -29756,46 +30617,22 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 23217}
-// add
-@SP
-AM=M-1
-D=M
-A=A-1
-M=M+D
-// {line: 23222}
-// pop pointer 1
-@SP
-AM=M-1
-D=M
-@THAT
-M=D
-// {line: 23228}
-// push pointer 0
-@3
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 23237}
-// push local 0
-@0
+// push this 1
+@1
 D=A
-@LCL
+@THIS
 A=M+D
 D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 23250}
-// call String.charAt nArgs: 2
-@2
+// call Memory.copy nArgs: 3
+@3
 D=A
 @R14
 M=D
-@String.charAt
+@Memory.copy
 D=A
 @R15
 M=D
@@ -29804,55 +30641,12 @@ D=A
 @call
 0;JMP
 (String.grow.call.1)
-// {line: 23256}
-// pop that 0
-@SP
-AM=M-1
-D=M
-@THAT
-A=M
-M=D
-// {line: 23265}
-// push local 0
-@0
-D=A
-@LCL
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 23271}
-// push constant 1
-@1
-D=A
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 23276}
-// add
-@SP
-AM=M-1
-D=M
-A=A-1
-M=M+D
-// {line: 23282}
-// pop local 0
+// pop temp 0
 @SP
 AM=M-1
 D=M
-@LCL
-A=M
+@R5
 M=D
-// {line: 23284}
-// goto String.grow.while.0
-@String.grow.while.0
-0;JMP
-// {line: 23285}
-(String.grow.while.1)
-// {line: 23294}
 // push this 0
 @0
 D=A
@@ -29863,7 +30657,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 23307}
 // call Array.dispose nArgs: 1
 @1
 D=A
@@ -29878,16 +30671,14 @@ D=A
 @call
 0;JMP
 (String.grow.call.2)
-// {line: 23312}
 // pop temp 0
 @SP
 AM=M-1
 D=M
 @R5
 M=D
-// {line: 23321}
-// push local 1
-@1
+// push local 0
+@0
 D=A
 @LCL
 A=M+D
@@ -29896,7 +30687,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 23327}
 // pop this 0
 @SP
 AM=M-1
@@ -29904,7 +30694,6 @@ D=M
 @THIS
 A=M
 M=D
-// {line: 23336}
 // push this 1
 @1
 D=A
@@ -29915,7 +30704,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 23342}
 // push constant 1
 @1
 D=A
@@ -29923,14 +30711,12 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 23347}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 23354}
 // pop this 1
 @SP
 AM=M-1
@@ -29939,7 +30725,6 @@ D=M
 A=M
 A=A+1
 M=D
-// {line: 23356}
 // return
 @return
 0;JMP
@@ -34358,207 +35143,91 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 26708}
-// pop static 15
-@SP
-AM=M-1
-D=M
-@Screen.static.15
-M=D
-// {line: 26714}
-// push constant 256
-@256
-D=A
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 26719}
-// pop static 16
-@SP
-AM=M-1
-D=M
-@Screen.static.16
-M=D
-// {line: 26725}
-// push constant 16384
-@16384
-D=A
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 26730}
-// pop static 17
-@SP
-AM=M-1
-D=M
-@Screen.static.17
-M=D
-// {line: 26732}
-// return
-@return
-0;JMP
-// {line: 26737}
-// function Screen.clearScreen nLocals: 1
-(Screen.clearScreen)
-@SP
-AM=M+1
-A=A-1
-M=0
-// {line: 26743}
-// push constant 8191
-@8191
-D=A
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 26749}
-// pop local 0
-@SP
-AM=M-1
-D=M
-@LCL
-A=M
-M=D
-// {line: 26750}
-(Screen.clearScreen.while.0)
-// {line: 26759}
-// push local 0
-@0
-D=A
-@LCL
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 26765}
-// push constant 1
-@1
-D=A
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 26768}
-// neg
-@SP
-A=M-1
-M=-M
-// {line: 26775}
-// gt
-@Screen.clearScreen.gt.0
-D=A
-@R14
-M=D
-@gt
-0;JMP
-(Screen.clearScreen.gt.0)
-// {line: 26778}
-// not
-@SP
-A=M-1
-M=!M
-// {line: 26783}
-// if-goto Screen.clearScreen.while.1
-@SP
-AM=M-1
-D=M
-@Screen.clearScreen.while.1
-D;JNE
-// {line: 26789}
-// push static 17
-@Screen.static.17
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 26798}
-// push local 0
-@0
-D=A
-@LCL
-A=M+D
+// {line: 26708}
+// pop static 15
+@SP
+AM=M-1
 D=M
+@Screen.static.15
+M=D
+// {line: 26714}
+// push constant 256
+@256
+D=A
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 26803}
-// add
-@SP
-AM=M-1
-D=M
-A=A-1
-M=M+D
-// {line: 26808}
-// pop pointer 1
+// {line: 26719}
+// pop static 16
 @SP
 AM=M-1
 D=M
-@THAT
+@Screen.static.16
 M=D
-// {line: 26814}
-// push constant 0
-@0
+// {line: 26725}
+// push constant 16384
+@16384
 D=A
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 26820}
-// pop that 0
+// {line: 26730}
+// pop static 17
 @SP
 AM=M-1
 D=M
-@THAT
-A=M
+@Screen.static.17
 M=D
-// {line: 26829}
-// push local 0
-@0
-D=A
-@LCL
-A=M+D
+// {line: 26732}
+// return
+@return
+0;JMP
+// {line: 26737}
+// function Screen.clearScreen nLocals: 0
+(Screen.clearScreen)
+// push static 17
+@Screen.static.17
 D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 26835}
-// push constant 1
-@1
+// push constant 8192
+@8192
 D=A
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 26840}
-// sub
+// push constant 0
+@0
+D=A
 @SP
-AM=M-1
-D=M
-A=A-1
-M=M-D
-// {line: 26846}
-// pop local 0
+M=M+1
+A=M-1
+M=D
+// call Memory.fill nArgs: 3
+@3
+D=A
+@R14
+M=D
+@Memory.fill
+D=A
+@R15
+M=D
+@Screen.clearScreen.call.0
+D=A
+@call
+0;JMP
+(Screen.clearScreen.call.0)
+// pop temp 0
 @SP
 AM=M-1
 D=M
-@LCL
-A=M
+@R5
 M=D
-// {line: 26848}
-// goto Screen.clearScreen.while.0
-@Screen.clearScreen.while.0
-0;JMP
-// {line: 26849}
-(Screen.clearScreen.while.1)
-// {line: 26851}
 // return
 @return
 0;JMP
@@ -34968,7 +35637,6 @@ M=0
 AM=M+1
 A=A-1
 M=0
-// {line: 27178}
 // push argument 1
 @1
 D=A
@@ -34979,7 +35647,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27187}
 // push argument 0
 @0
 D=A
@@ -34990,14 +35657,12 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27192}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 27198}
 // pop local 0
 @SP
 AM=M-1
@@ -35005,7 +35670,6 @@ D=M
 @LCL
 A=M
 M=D
-// {line: 27207}
 // push local 0
 @0
 D=A
@@ -35016,7 +35680,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27213}
 // push constant 0
 @0
 D=A
@@ -35024,7 +35687,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27220}
 // gt
 @Screen.drawHoriz.gt.0
 D=A
@@ -35033,14 +35695,12 @@ M=D
 @gt
 0;JMP
 (Screen.drawHoriz.gt.0)
-// {line: 27225}
 // pop temp 1
 @SP
 AM=M-1
 D=M
 @R6
 M=D
-// {line: 27231}
 // push temp 1
 @6
 D=M
@@ -35048,7 +35708,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27237}
 // push temp 1
 @6
 D=M
@@ -35056,19 +35715,16 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27240}
 // not
 @SP
 A=M-1
 M=!M
-// {line: 27245}
 // if-goto Screen.drawHoriz.if.0
 @SP
 AM=M-1
 D=M
 @Screen.drawHoriz.if.0
 D;JNE
-// {line: 27254}
 // push local 0
 @0
 D=A
@@ -35079,7 +35735,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27260}
 // push constant 16
 @16
 D=A
@@ -35087,7 +35742,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27267}
 // gt
 @Screen.drawHoriz.gt.1
 D=A
@@ -35096,14 +35750,12 @@ M=D
 @gt
 0;JMP
 (Screen.drawHoriz.gt.1)
-// {line: 27272}
 // pop temp 1
 @SP
 AM=M-1
 D=M
 @R6
 M=D
-// {line: 27278}
 // push temp 1
 @6
 D=M
@@ -35111,7 +35763,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27284}
 // push temp 1
 @6
 D=M
@@ -35119,19 +35770,16 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27287}
 // not
 @SP
 A=M-1
 M=!M
-// {line: 27292}
 // if-goto Screen.drawHoriz.if.1
 @SP
 AM=M-1
 D=M
 @Screen.drawHoriz.if.1
 D;JNE
-// {line: 27298}
 // push constant 16
 @16
 D=A
@@ -35139,7 +35787,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27307}
 // push argument 0
 @0
 D=A
@@ -35150,7 +35797,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27313}
 // push constant 16
 @16
 D=A
@@ -35158,7 +35804,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27326}
 // call Math.mod nArgs: 2
 @2
 D=A
@@ -35173,14 +35818,12 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.0)
-// {line: 27331}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 27338}
 // pop local 1
 @SP
 AM=M-1
@@ -35189,7 +35832,6 @@ D=M
 A=M
 A=A+1
 M=D
-// {line: 27347}
 // push argument 2
 @2
 D=A
@@ -35200,7 +35842,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27353}
 // push constant 32
 @32
 D=A
@@ -35208,7 +35849,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27366}
 // call Math.multiply nArgs: 2
 @2
 D=A
@@ -35223,7 +35863,6 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.1)
-// {line: 27378}
 // pop local 6
 @SP
 AM=M-1
@@ -35237,9 +35876,7 @@ A=A+1
 A=A+1
 A=A+1
 M=D
-// {line: 27379}
 (Screen.drawHoriz.while.0)
-// {line: 27388}
 // push local 1
 @1
 D=A
@@ -35250,7 +35887,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27394}
 // push constant 0
 @0
 D=A
@@ -35258,7 +35894,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27401}
 // gt
 @Screen.drawHoriz.gt.2
 D=A
@@ -35267,19 +35902,16 @@ M=D
 @gt
 0;JMP
 (Screen.drawHoriz.gt.2)
-// {line: 27404}
 // not
 @SP
 A=M-1
 M=!M
-// {line: 27409}
 // if-goto Screen.drawHoriz.while.1
 @SP
 AM=M-1
 D=M
 @Screen.drawHoriz.while.1
 D;JNE
-// {line: 27418}
 // push argument 0
 @0
 D=A
@@ -35290,7 +35922,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27427}
 // push local 1
 @1
 D=A
@@ -35301,14 +35932,12 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27432}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 27438}
 // push constant 16
 @16
 D=A
@@ -35316,7 +35945,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27451}
 // call Math.divide nArgs: 2
 @2
 D=A
@@ -35331,7 +35959,6 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.2)
-// {line: 27460}
 // push local 6
 @6
 D=A
@@ -35342,14 +35969,12 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27465}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 27476}
 // pop local 5
 @SP
 AM=M-1
@@ -35362,7 +35987,6 @@ A=A+1
 A=A+1
 A=A+1
 M=D
-// {line: 27485}
 // push argument 0
 @0
 D=A
@@ -35373,7 +35997,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27494}
 // push local 1
 @1
 D=A
@@ -35384,14 +36007,12 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27499}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 27505}
 // push constant 16
 @16
 D=A
@@ -35399,7 +36020,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27518}
 // call Math.mod nArgs: 2
 @2
 D=A
@@ -35414,7 +36034,6 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.3)
-// {line: 27531}
 // call Math.twoToThe nArgs: 1
 @1
 D=A
@@ -35429,7 +36048,6 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.4)
-// {line: 27540}
 // pop local 3
 @SP
 AM=M-1
@@ -35440,7 +36058,6 @@ A=A+1
 A=A+1
 A=A+1
 M=D
-// {line: 27546}
 // push static 17
 @Screen.static.17
 D=M
@@ -35448,7 +36065,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27555}
 // push local 5
 @5
 D=A
@@ -35459,21 +36075,18 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27560}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 27565}
 // pop pointer 1
 @SP
 AM=M-1
 D=M
 @THAT
 M=D
-// {line: 27571}
 // push pointer 1
 @4
 D=M
@@ -35481,7 +36094,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27577}
 // push static 17
 @Screen.static.17
 D=M
@@ -35489,7 +36101,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27586}
 // push local 5
 @5
 D=A
@@ -35500,21 +36111,18 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27591}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 27596}
 // pop pointer 1
 @SP
 AM=M-1
 D=M
 @THAT
 M=D
-// {line: 27605}
 // push that 0
 @0
 D=A
@@ -35525,21 +36133,18 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27610}
 // pop temp 2
 @SP
 AM=M-1
 D=M
 @R7
 M=D
-// {line: 27615}
 // pop pointer 1
 @SP
 AM=M-1
 D=M
 @THAT
 M=D
-// {line: 27621}
 // push temp 2
 @7
 D=M
@@ -35547,7 +36152,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27630}
 // push local 3
 @3
 D=A
@@ -35558,19 +36162,16 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27633}
 // not
 @SP
 A=M-1
 M=!M
-// {line: 27638}
 // and
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M&D
-// {line: 27644}
 // push static 14
 @Screen.static.14
 D=M
@@ -35578,7 +36179,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27653}
 // push local 3
 @3
 D=A
@@ -35589,21 +36189,18 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27658}
 // and
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M&D
-// {line: 27663}
 // or
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M|D
-// {line: 27669}
 // pop that 0
 @SP
 AM=M-1
@@ -35611,7 +36208,6 @@ D=M
 @THAT
 A=M
 M=D
-// {line: 27678}
 // push local 1
 @1
 D=A
@@ -35622,7 +36218,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27684}
 // push constant 1
 @1
 D=A
@@ -35630,14 +36225,12 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27689}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 27696}
 // pop local 1
 @SP
 AM=M-1
@@ -35646,13 +36239,10 @@ D=M
 A=M
 A=A+1
 M=D
-// {line: 27698}
 // goto Screen.drawHoriz.while.0
 @Screen.drawHoriz.while.0
 0;JMP
-// {line: 27699}
 (Screen.drawHoriz.while.1)
-// {line: 27708}
 // push argument 0
 @0
 D=A
@@ -35663,7 +36253,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27714}
 // push constant 16
 @16
 D=A
@@ -35671,7 +36260,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27723}
 // push argument 0
 @0
 D=A
@@ -35682,7 +36270,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27729}
 // push constant 16
 @16
 D=A
@@ -35690,7 +36277,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27742}
 // call Math.mod nArgs: 2
 @2
 D=A
@@ -35705,21 +36291,18 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.5)
-// {line: 27747}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 27752}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 27758}
 // pop argument 0
 @SP
 AM=M-1
@@ -35727,7 +36310,6 @@ D=M
 @ARG
 A=M
 M=D
-// {line: 27767}
 // push argument 1
 @1
 D=A
@@ -35738,7 +36320,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27773}
 // push constant 16
 @16
 D=A
@@ -35746,7 +36327,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27786}
 // call Math.mod nArgs: 2
 @2
 D=A
@@ -35761,7 +36341,6 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.6)
-// {line: 27793}
 // pop local 1
 @SP
 AM=M-1
@@ -35770,9 +36349,7 @@ D=M
 A=M
 A=A+1
 M=D
-// {line: 27794}
 (Screen.drawHoriz.while.2)
-// {line: 27803}
 // push local 1
 @1
 D=A
@@ -35783,7 +36360,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27809}
 // push constant 0
 @0
 D=A
@@ -35791,7 +36367,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27816}
 // gt
 @Screen.drawHoriz.gt.3
 D=A
@@ -35800,19 +36375,16 @@ M=D
 @gt
 0;JMP
 (Screen.drawHoriz.gt.3)
-// {line: 27819}
 // not
 @SP
 A=M-1
 M=!M
-// {line: 27824}
 // if-goto Screen.drawHoriz.while.3
 @SP
 AM=M-1
 D=M
 @Screen.drawHoriz.while.3
 D;JNE
-// {line: 27833}
 // push argument 1
 @1
 D=A
@@ -35823,7 +36395,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27842}
 // push local 1
 @1
 D=A
@@ -35834,14 +36405,12 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27847}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 27853}
 // push constant 16
 @16
 D=A
@@ -35849,7 +36418,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27866}
 // call Math.divide nArgs: 2
 @2
 D=A
@@ -35864,7 +36432,6 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.7)
-// {line: 27875}
 // push local 6
 @6
 D=A
@@ -35875,14 +36442,12 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27880}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 27891}
 // pop local 5
 @SP
 AM=M-1
@@ -35895,7 +36460,6 @@ A=A+1
 A=A+1
 A=A+1
 M=D
-// {line: 27900}
 // push argument 1
 @1
 D=A
@@ -35906,7 +36470,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27909}
 // push local 1
 @1
 D=A
@@ -35917,14 +36480,12 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27914}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 27920}
 // push constant 16
 @16
 D=A
@@ -35932,7 +36493,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 27933}
 // call Math.mod nArgs: 2
 @2
 D=A
@@ -35947,7 +36507,6 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.8)
-// {line: 27946}
 // call Math.twoToThe nArgs: 1
 @1
 D=A
@@ -35962,7 +36521,6 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.9)
-// {line: 27955}
 // pop local 3
 @SP
 AM=M-1
@@ -35973,7 +36531,6 @@ A=A+1
 A=A+1
 A=A+1
 M=D
-// {line: 27961}
 // push static 17
 @Screen.static.17
 D=M
@@ -35981,7 +36538,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27970}
 // push local 5
 @5
 D=A
@@ -35992,21 +36548,18 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27975}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 27980}
 // pop pointer 1
 @SP
 AM=M-1
 D=M
 @THAT
 M=D
-// {line: 27986}
 // push pointer 1
 @4
 D=M
@@ -36014,7 +36567,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 27992}
 // push static 17
 @Screen.static.17
 D=M
@@ -36022,7 +36574,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28001}
 // push local 5
 @5
 D=A
@@ -36033,21 +36584,18 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28006}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 28011}
 // pop pointer 1
 @SP
 AM=M-1
 D=M
 @THAT
 M=D
-// {line: 28020}
 // push that 0
 @0
 D=A
@@ -36058,21 +36606,18 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28025}
 // pop temp 2
 @SP
 AM=M-1
 D=M
 @R7
 M=D
-// {line: 28030}
 // pop pointer 1
 @SP
 AM=M-1
 D=M
 @THAT
 M=D
-// {line: 28036}
 // push temp 2
 @7
 D=M
@@ -36080,7 +36625,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28045}
 // push local 3
 @3
 D=A
@@ -36091,19 +36635,16 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28048}
 // not
 @SP
 A=M-1
 M=!M
-// {line: 28053}
 // and
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M&D
-// {line: 28059}
 // push static 14
 @Screen.static.14
 D=M
@@ -36111,7 +36652,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28068}
 // push local 3
 @3
 D=A
@@ -36122,21 +36662,18 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28073}
 // and
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M&D
-// {line: 28078}
 // or
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M|D
-// {line: 28084}
 // pop that 0
 @SP
 AM=M-1
@@ -36144,7 +36681,6 @@ D=M
 @THAT
 A=M
 M=D
-// {line: 28093}
 // push local 1
 @1
 D=A
@@ -36155,7 +36691,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28099}
 // push constant 1
 @1
 D=A
@@ -36163,14 +36698,12 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 28104}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 28111}
 // pop local 1
 @SP
 AM=M-1
@@ -36179,13 +36712,10 @@ D=M
 A=M
 A=A+1
 M=D
-// {line: 28113}
 // goto Screen.drawHoriz.while.2
 @Screen.drawHoriz.while.2
 0;JMP
-// {line: 28114}
 (Screen.drawHoriz.while.3)
-// {line: 28123}
 // push argument 1
 @1
 D=A
@@ -36196,7 +36726,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28132}
 // push argument 1
 @1
 D=A
@@ -36207,7 +36736,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28138}
 // push constant 16
 @16
 D=A
@@ -36215,7 +36743,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 28151}
 // call Math.mod nArgs: 2
 @2
 D=A
@@ -36230,14 +36757,12 @@ D=A
 @call
 0;JMP
 (Screen.drawHoriz.call.10)
-// {line: 28156}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 28163}
 // pop argument 1
 @SP
 AM=M-1
@@ -36246,18 +36771,13 @@ D=M
 A=M
 A=A+1
 M=D
-// {line: 28172}
-// push argument 1
-@1
-D=A
-@ARG
-A=M+D
+// push static 17
+@Screen.static.17
 D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 28181}
 // push argument 0
 @0
 D=A
@@ -36268,64 +36788,49 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28186}
-// sub
-@SP
-AM=M-1
-D=M
-A=A-1
-M=M-D
-// {line: 28192}
-// pop local 0
-@SP
-AM=M-1
-D=M
-@LCL
-A=M
-M=D
-// {line: 28193}
-(Screen.drawHoriz.while.4)
-// {line: 28202}
-// push local 0
-@0
+// push constant 16
+@16
 D=A
-@LCL
-A=M+D
-D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 28208}
-// push constant 0
-@0
+// call Math.divide nArgs: 2
+@2
 D=A
-@SP
-M=M+1
-A=M-1
+@R14
 M=D
-// {line: 28215}
-// gt
-@Screen.drawHoriz.gt.4
+@Math.divide
 D=A
-@R14
+@R15
 M=D
-@gt
+@Screen.drawHoriz.call.11
+D=A
+@call
 0;JMP
-(Screen.drawHoriz.gt.4)
-// {line: 28218}
-// not
+(Screen.drawHoriz.call.11)
+// add
 @SP
+AM=M-1
+D=M
+A=A-1
+M=M+D
+// push local 6
+@6
+D=A
+@LCL
+A=M+D
+D=M
+@SP
+M=M+1
 A=M-1
-M=!M
-// {line: 28223}
-// if-goto Screen.drawHoriz.while.5
+M=D
+// add
 @SP
 AM=M-1
 D=M
-@Screen.drawHoriz.while.5
-D;JNE
-// {line: 28232}
+A=A-1
+M=M+D
 // push argument 1
 @1
 D=A
@@ -36336,25 +36841,22 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28241}
-// push local 0
+// push argument 0
 @0
 D=A
-@LCL
+@ARG
 A=M+D
 D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 28246}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 28252}
 // push constant 16
 @16
 D=A
@@ -36362,7 +36864,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 28265}
 // call Math.divide nArgs: 2
 @2
 D=A
@@ -36372,76 +36873,11 @@ M=D
 D=A
 @R15
 M=D
-@Screen.drawHoriz.call.11
+@Screen.drawHoriz.call.12
 D=A
 @call
 0;JMP
-(Screen.drawHoriz.call.11)
-// {line: 28274}
-// push local 6
-@6
-D=A
-@LCL
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 28279}
-// add
-@SP
-AM=M-1
-D=M
-A=A-1
-M=M+D
-// {line: 28290}
-// pop local 5
-@SP
-AM=M-1
-D=M
-@LCL
-A=M
-A=A+1
-A=A+1
-A=A+1
-A=A+1
-A=A+1
-M=D
-// {line: 28296}
-// push static 17
-@Screen.static.17
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 28305}
-// push local 5
-@5
-D=A
-@LCL
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 28310}
-// add
-@SP
-AM=M-1
-D=M
-A=A-1
-M=M+D
-// {line: 28315}
-// pop pointer 1
-@SP
-AM=M-1
-D=M
-@THAT
-M=D
-// {line: 28321}
+(Screen.drawHoriz.call.12)
 // push static 14
 @Screen.static.14
 D=M
@@ -36449,66 +36885,34 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28327}
-// pop that 0
-@SP
-AM=M-1
-D=M
-@THAT
-A=M
-M=D
-// {line: 28336}
-// push local 0
-@0
+// call Memory.fill nArgs: 3
+@3
 D=A
-@LCL
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
+@R14
 M=D
-// {line: 28342}
-// push constant 16
-@16
+@Memory.fill
 D=A
-@SP
-M=M+1
-A=M-1
+@R15
 M=D
-// {line: 28347}
-// sub
-@SP
-AM=M-1
-D=M
-A=A-1
-M=M-D
-// {line: 28353}
-// pop local 0
+@Screen.drawHoriz.call.13
+D=A
+@call
+0;JMP
+(Screen.drawHoriz.call.13)
+// pop temp 0
 @SP
 AM=M-1
 D=M
-@LCL
-A=M
+@R5
 M=D
-// {line: 28355}
-// goto Screen.drawHoriz.while.4
-@Screen.drawHoriz.while.4
-0;JMP
-// {line: 28356}
-(Screen.drawHoriz.while.5)
-// {line: 28357}
 (Screen.drawHoriz.if.1)
-// {line: 28362}
 // if-goto Screen.drawHoriz.goto.0
 @SP
 AM=M-1
 D=M
 @Screen.drawHoriz.goto.0
 D;JNE
-// {line: 28363}
-(Screen.drawHoriz.while.6)
-// {line: 28372}
+(Screen.drawHoriz.while.4)
 // push local 0
 @0
 D=A
@@ -36519,7 +36923,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28378}
 // push constant 0
 @0
 D=A
@@ -36527,28 +36930,24 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 28385}
 // gt
-@Screen.drawHoriz.gt.5
+@Screen.drawHoriz.gt.4
 D=A
 @R14
 M=D
 @gt
 0;JMP
-(Screen.drawHoriz.gt.5)
-// {line: 28388}
+(Screen.drawHoriz.gt.4)
 // not
 @SP
 A=M-1
 M=!M
-// {line: 28393}
-// if-goto Screen.drawHoriz.while.7
+// if-goto Screen.drawHoriz.while.5
 @SP
 AM=M-1
 D=M
-@Screen.drawHoriz.while.7
+@Screen.drawHoriz.while.5
 D;JNE
-// {line: 28402}
 // push argument 0
 @0
 D=A
@@ -36559,7 +36958,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28411}
 // push local 0
 @0
 D=A
@@ -36570,14 +36968,12 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28416}
 // add
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M+D
-// {line: 28425}
 // push argument 2
 @2
 D=A
@@ -36588,7 +36984,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28438}
 // call Screen.drawPixel nArgs: 2
 @2
 D=A
@@ -36598,19 +36993,17 @@ M=D
 D=A
 @R15
 M=D
-@Screen.drawHoriz.call.12
+@Screen.drawHoriz.call.14
 D=A
 @call
 0;JMP
-(Screen.drawHoriz.call.12)
-// {line: 28443}
+(Screen.drawHoriz.call.14)
 // pop temp 0
 @SP
 AM=M-1
 D=M
 @R5
 M=D
-// {line: 28452}
 // push local 0
 @0
 D=A
@@ -36621,7 +37014,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28458}
 // push constant 1
 @1
 D=A
@@ -36629,14 +37021,12 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 28463}
 // sub
 @SP
 AM=M-1
 D=M
 A=A-1
 M=M-D
-// {line: 28469}
 // pop local 0
 @SP
 AM=M-1
@@ -36644,24 +37034,18 @@ D=M
 @LCL
 A=M
 M=D
-// {line: 28471}
-// goto Screen.drawHoriz.while.6
-@Screen.drawHoriz.while.6
+// goto Screen.drawHoriz.while.4
+@Screen.drawHoriz.while.4
 0;JMP
-// {line: 28472}
-(Screen.drawHoriz.while.7)
-// {line: 28473}
+(Screen.drawHoriz.while.5)
 (Screen.drawHoriz.goto.0)
-// {line: 28474}
 (Screen.drawHoriz.if.0)
-// {line: 28479}
 // if-goto Screen.drawHoriz.goto.1
 @SP
 AM=M-1
 D=M
 @Screen.drawHoriz.goto.1
 D;JNE
-// {line: 28488}
 // push argument 1
 @1
 D=A
@@ -36672,7 +37056,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28497}
 // push argument 0
 @0
 D=A
@@ -36683,7 +37066,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28506}
 // push argument 2
 @2
 D=A
@@ -36694,7 +37076,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 28519}
 // call Screen.drawHoriz nArgs: 3
 @3
 D=A
@@ -36704,21 +37085,18 @@ M=D
 D=A
 @R15
 M=D
-@Screen.drawHoriz.call.13
+@Screen.drawHoriz.call.15
 D=A
 @call
 0;JMP
-(Screen.drawHoriz.call.13)
-// {line: 28524}
+(Screen.drawHoriz.call.15)
 // pop temp 0
 @SP
 AM=M-1
 D=M
 @R5
 M=D
-// {line: 28525}
 (Screen.drawHoriz.goto.1)
-// {line: 28527}
 // return
 @return
 0;JMP
@@ -39862,39 +40240,9 @@ AM=M-1
 D=M
 @R5
 M=D
-// {line: 30966}
-// push constant 60
-@60
-D=A
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 30979}
-// call Sys.setWaitRate nArgs: 1
-@1
-D=A
-@R14
-M=D
-@Sys.setWaitRate
-D=A
-@R15
-M=D
-@Sys.init.call.6
-D=A
-@call
-0;JMP
-(Sys.init.call.6)
-// {line: 30984}
-// pop temp 0
-@SP
-AM=M-1
-D=M
-@R5
-M=D
 // {line: 30990}
-// push static 12
-@Sys.static.12
+// push static 11
+@Sys.static.11
 D=M
 @SP
 M=M+1
@@ -39945,11 +40293,11 @@ M=D
 D=A
 @R15
 M=D
-@Sys.init.call.7
+@Sys.init.call.6
 D=A
 @call
 0;JMP
-(Sys.init.call.7)
+(Sys.init.call.6)
 // {line: 31033}
 // pop temp 0
 @SP
@@ -39976,11 +40324,11 @@ M=D
 D=A
 @R15
 M=D
-@Sys.init.call.8
+@Sys.init.call.7
 D=A
 @call
 0;JMP
-(Sys.init.call.8)
+(Sys.init.call.7)
 // {line: 31057}
 // pop temp 0
 @SP
@@ -39998,11 +40346,11 @@ M=D
 D=A
 @R15
 M=D
-@Sys.init.call.9
+@Sys.init.call.8
 D=A
 @call
 0;JMP
-(Sys.init.call.9)
+(Sys.init.call.8)
 // {line: 31075}
 // pop temp 0
 @SP
@@ -40037,38 +40385,13 @@ M=M+1
 A=M-1
 M=D
 // {line: 31098}
-// pop static 12
-@SP
-AM=M-1
-D=M
-@Sys.static.12
-M=D
-// {line: 31100}
-// return
-@return
-0;JMP
-// {line: 31101}
-// function Sys.setWaitRate nLocals: 0
-(Sys.setWaitRate)
-// {line: 31110}
-// push argument 0
-@0
-D=A
-@ARG
-A=M+D
-D=M
-@SP
-M=M+1
-A=M-1
-M=D
-// {line: 31115}
 // pop static 11
 @SP
 AM=M-1
 D=M
 @Sys.static.11
 M=D
-// {line: 31117}
+// {line: 31100}
 // return
 @return
 0;JMP
@@ -40957,7 +41280,6 @@ M=D
 AM=M+1
 A=A-1
 M=0
-// {line: 31831}
 // push argument 0
 @0
 D=A
@@ -40968,7 +41290,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 31837}
 // push constant 0
 @0
 D=A
@@ -40976,7 +41297,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 31844}
 // lt
 @Sys.wait.lt.0
 D=A
@@ -40985,14 +41305,12 @@ M=D
 @lt
 0;JMP
 (Sys.wait.lt.0)
-// {line: 31849}
 // pop temp 1
 @SP
 AM=M-1
 D=M
 @R6
 M=D
-// {line: 31855}
 // push temp 1
 @6
 D=M
@@ -41000,7 +41318,6 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 31861}
 // push temp 1
 @6
 D=M
@@ -41008,19 +41325,16 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 31864}
 // not
 @SP
 A=M-1
 M=!M
-// {line: 31869}
 // if-goto Sys.wait.if.0
 @SP
 AM=M-1
 D=M
 @Sys.wait.if.0
 D;JNE
-// {line: 31875}
 // push constant 1
 @1
 D=A
@@ -41028,7 +41342,6 @@ D=A
 M=M+1
 A=M-1
 M=D
-// {line: 31888}
 // call Sys.error nArgs: 1
 @1
 D=A
@@ -41043,31 +41356,33 @@ D=A
 @call
 0;JMP
 (Sys.wait.call.0)
-// {line: 31893}
 // pop temp 0
 @SP
 AM=M-1
 D=M
 @R5
 M=D
-// {line: 31894}
 (Sys.wait.if.0)
-// {line: 31899}
 // pop temp 1
 @SP
 AM=M-1
 D=M
 @R6
 M=D
-// {line: 31905}
-// push static 11
-@Sys.static.11
-D=M
-@SP
-M=M+1
-A=M-1
+// call Sys.time nArgs: 0
+@0
+D=A
+@R14
+M=D
+@Sys.time
+D=A
+@R15
 M=D
-// {line: 31911}
+@Sys.wait.call.1
+D=A
+@call
+0;JMP
+(Sys.wait.call.1)
 // pop local 0
 @SP
 AM=M-1
@@ -41075,91 +41390,106 @@ D=M
 @LCL
 A=M
 M=D
-// {line: 31912}
 (Sys.wait.while.0)
-// {line: 31921}
-// push argument 0
+// call Sys.time nArgs: 0
 @0
 D=A
-@ARG
+@R14
+M=D
+@Sys.time
+D=A
+@R15
+M=D
+@Sys.wait.call.2
+D=A
+@call
+0;JMP
+(Sys.wait.call.2)
+// push local 0
+@0
+D=A
+@LCL
 A=M+D
 D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 31927}
-// push constant 0
+// sub
+@SP
+AM=M-1
+D=M
+A=A-1
+M=M-D
+// push argument 0
 @0
 D=A
+@ARG
+A=M+D
+D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 31934}
-// gt
-@Sys.wait.gt.0
+// lt
+@Sys.wait.lt.1
 D=A
 @R14
 M=D
-@gt
+@lt
 0;JMP
-(Sys.wait.gt.0)
-// {line: 31937}
+(Sys.wait.lt.1)
 // not
 @SP
 A=M-1
 M=!M
-// {line: 31942}
 // if-goto Sys.wait.while.1
 @SP
 AM=M-1
 D=M
 @Sys.wait.while.1
 D;JNE
-// {line: 31943}
-(Sys.wait.while.2)
-// {line: 31952}
-// push local 0
+// goto Sys.wait.while.0
+@Sys.wait.while.0
+0;JMP
+(Sys.wait.while.1)
+// push constant 0
 @0
 D=A
-@LCL
-A=M+D
-D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 31958}
-// push constant 0
-@0
+// return
+@return
+0;JMP
+// function Sys.time nLocals: 1
+(Sys.time)
+@SP
+AM=M+1
+A=A-1
+M=0
+// push constant 24577
+@24577
 D=A
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 31965}
-// gt
-@Sys.wait.gt.1
-D=A
-@R14
-M=D
-@gt
-0;JMP
-(Sys.wait.gt.1)
-// {line: 31968}
-// not
-@SP
-A=M-1
-M=!M
-// {line: 31973}
-// if-goto Sys.wait.while.3
+// pop local 0
 @SP
 AM=M-1
 D=M
-@Sys.wait.while.3
-D;JNE
-// {line: 31982}
+@LCL
+A=M
+M=D
+// push pointer 1
+@4
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
 // push local 0
 @0
 D=A
@@ -41170,44 +41500,70 @@ D=M
 M=M+1
 A=M-1
 M=D
-// {line: 31988}
-// push constant 1
-@1
+// push constant 0
+@0
 D=A
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 31993}
-// sub
+// add
 @SP
 AM=M-1
 D=M
 A=A-1
-M=M-D
-// {line: 31999}
-// pop local 0
+M=M+D
+// pop pointer 1
 @SP
 AM=M-1
 D=M
-@LCL
-A=M
+@THAT
 M=D
-// {line: 32001}
-// goto Sys.wait.while.2
-@Sys.wait.while.2
-0;JMP
-// {line: 32002}
-(Sys.wait.while.3)
-// {line: 32008}
-// push static 11
-@Sys.static.11
+// push that 0
+@0
+D=A
+@THAT
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop temp 2
+@SP
+AM=M-1
+D=M
+@R7
+M=D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push temp 2
+@7
 D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 32014}
+// return
+@return
+0;JMP
+// function Sys.cycles nLocals: 1
+(Sys.cycles)
+@SP
+AM=M+1
+A=A-1
+M=0
+// push constant 24578
+@24578
+D=A
+@SP
+M=M+1
+A=M-1
+M=D
 // pop local 0
 @SP
 AM=M-1
@@ -41215,55 +41571,71 @@ D=M
 @LCL
 A=M
 M=D
-// {line: 32023}
-// push argument 0
+// push pointer 1
+@4
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// push local 0
 @0
 D=A
-@ARG
+@LCL
 A=M+D
 D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 32029}
-// push constant 1
-@1
+// push constant 0
+@0
 D=A
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 32034}
-// sub
+// add
 @SP
 AM=M-1
 D=M
 A=A-1
-M=M-D
-// {line: 32040}
-// pop argument 0
+M=M+D
+// pop pointer 1
 @SP
 AM=M-1
 D=M
-@ARG
-A=M
+@THAT
 M=D
-// {line: 32042}
-// goto Sys.wait.while.0
-@Sys.wait.while.0
-0;JMP
-// {line: 32043}
-(Sys.wait.while.1)
-// {line: 32049}
-// push constant 0
+// push that 0
 @0
 D=A
+@THAT
+A=M+D
+D=M
+@SP
+M=M+1
+A=M-1
+M=D
+// pop temp 2
+@SP
+AM=M-1
+D=M
+@R7
+M=D
+// pop pointer 1
+@SP
+AM=M-1
+D=M
+@THAT
+M=D
+// push temp 2
+@7
+D=M
 @SP
 M=M+1
 A=M-1
 M=D
-// {line: 32051}
 // return
 @return
 0;JMP
@@ -0,0 +1,410 @@
+"""Runs nand2tetris test scripts (.tst) written for the CPU emulator on
+a headless Jarvis CPU.
+
+The CPU emulator subset of the script language is supported:
+
+    load Prog.hack          (or Prog.asm, whichever of the two exists)
+    output-file Prog.out
+    compare-to Prog.cmp
+    output-list RAM[0]%D2.6.2 PC%D0.5.0 A%X1.4.1 time%S1.4.1 ...
+    set RAM[0] 256          (also PC, A and D)
+    repeat 600 { ticktock; }
+    output
+    echo "..."
+
+Scripts for the hardware simulator and the VM emulator (tick, tock,
+vmstep, load of a directory) raise a TestScriptError.
+
+Usage: python3 TestScript.py [file.tst or directory ...]
+"""
+
+import os, re, sys, time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import Jarvis
+
+# what TestScript.run() returns.  status is "pass", "fail" (the output
+# differs from the compare file), "done" (nothing to compare to) or "error".
+
+TestResult = namedtuple("TestResult", ("name", "status", "seconds", "cycles", "message"))
+
+commentPattern = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+tokenPattern = re.compile(r'"[^"]*"|[{},;]|[^\s{},;]+')
+formatPattern = re.compile(r"^(.+)%([BDXS])(\d+)\.(\d+)\.(\d+)$")
+variablePattern = re.compile(r"^RAM\[(\d+)\]$")
+
+# the CPU emulator runs a 32K ROM, zero words (@0) past the program
+
+romSize = 32768
+
+def tokenize(text):
+    """Splits a script into words, separators and braces
+
+    >>> tokenize("repeat 600 { // comment\\n ticktock; }")
+    ['repeat', '600', '{', 'ticktock', ';', '}']
+
+    Returns => list of strings"""
+
+    return tokenPattern.findall(commentPattern.sub(" ", text))
+
+def parse_script(tokens):
+    """Groups tokens into commands, a command being a list of words.
+    A block is a tuple of the words before it and its commands.
+
+    >>> parse_script(iter(tokenize("set PC 0, repeat 2 { ticktock; } output;")))
+    [['set', 'PC', '0'], (['repeat', '2'], [['ticktock']]), ['output']]
+
+    Returns => list of commands"""
+
+    commands = []
+    words = []
+
+    for token in tokens:
+
+        if token in ",;":
+            if words:
+                commands.append(words)
+            words = []
+
+        elif token == "{":
+            commands.append((words, parse_script(tokens)))
+            words = []
+
+        elif token == "}":
+            break
+
+        else:
+            words.append(token)
+
+    if words:
+        commands.append(words)
+
+    return commands
+
+def parse_column(spec):
+    """Parses an output-list entry
+
+    >>> parse_column("RAM[256]%D1.6.1")
+    ('RAM[256]', 'D', 1, 6, 1)
+    >>> parse_column("PC")
+    ('PC', 'D', 1, 6, 1)
+
+    Returns => (variable, format, left padding, width, right padding)"""
+
+    match = formatPattern.match(spec)
+
+    if not match:
+        return (spec, "D", 1, 6, 1)
+
+    name, kind, left, width, right = match.groups()
+
+    return (name, kind, int(left), int(width), int(right))
+
+def format_value(value, kind, width):
+    """Formats a value the way the CPU emulator does
+
+    >>> format_value(-3, "D", 6)
+    '    -3'
+    >>> format_value(-3, "X", 4)
+    'FFFD'
+    >>> format_value(5, "B", 8)
+    '00000101'
+
+    Returns => string of width characters"""
+
+    if kind == "D":
+        return str(value).rjust(width)[-width:]
+    elif kind == "X":
+        return ("%X" % (value & 0xFFFF)).zfill(width)[-width:]
+    elif kind == "B":
+        return bin(value & 0xFFFF)[2:].zfill(width)[-width:]
+    else:
+        return str(value).ljust(width)[:width]
+
+def parse_value(text):
+    """Parses a value of a set command, %B, %X and %D prefixes included
+
+    >>> parse_value("%X7FFF"), parse_value("%B101"), parse_value("-1")
+    (32767, 5, -1)
+
+    Returns => int"""
+
+    if text.startswith("%"):
+        return int(text[2:], { "B" : 2, "X" : 16, "D" : 10 }[text[1].upper()])
+
+    return int(text)
+
+
+class TestScriptError(Jarvis.Error):
+    """Exception raised for a script the CPU emulator would not run."""
+    pass
+
+
+class TestScript:
+    """A .tst script for the CPU emulator, run on a headless CPU.
+
+    Runs of ticktock are executed with CPU.run(), so they cost no more
+    than running the program itself.  A program that has halted in the
+    usual @END, 0;JMP loop is fast-forwarded to the end of the run."""
+
+    def __init__(self, filename, jit=True):
+
+        self.filename = filename
+        self.directory = os.path.dirname(filename)
+        self.jit = jit
+
+        with open(filename) as inputfile:
+            self.commands = parse_script(iter(tokenize(inputfile.read())))
+
+        self.cpu = None
+        self.halts = frozenset()
+        self.columns = []
+        self.lines = []
+        self.outputfile = None
+        self.comparefile = None
+
+    def run(self):
+        """Runs the script, writes its output file and compares it to the
+        compare file.
+
+        Returns => TestResult"""
+
+        started = time.time()
+        name = os.path.relpath(self.filename)
+
+        # a script that fails in any way is an error of its own, the
+        # rest of a run_scripts() goes on
+
+        try:
+            self.execute(self.commands)
+
+        except Exception as e:
+            return TestResult(name, "error", time.time() - started, self.time(), "%s: %s" % (type(e).__name__, e))
+
+        self.write()
+
+        seconds = time.time() - started
+
+        if not self.comparefile:
+            return TestResult(name, "done", seconds, self.time(), "")
+
+        with open(self.comparefile) as comparefile:
+            expected = comparefile.read().splitlines()
+
+        # like the book's TextComparer, whitespace does not count
+
+        for linenum, (line, compare) in enumerate(zip(self.lines, expected), 1):
+            if line.split() != compare.split():
+                return TestResult(name, "fail", seconds, self.time(),
+                                  "comparison failure at line %i\n  expected %s\n  got      %s" % (linenum, compare, line))
+
+        if len(self.lines) < len(expected):
+            return TestResult(name, "fail", seconds, self.time(), "output ends at line %i" % len(self.lines))
+
+        return TestResult(name, "pass", seconds, self.time(), "")
+
+    def loaded(self):
+        """Returns => the CPU of the program the script loaded"""
+
+        if self.cpu is None:
+            raise TestScriptError("no program loaded")
+
+        return self.cpu
+
+    def time(self):
+        return self.cpu.iterations if self.cpu else 0
+
+    def write(self):
+
+        if self.outputfile:
+            with open(self.outputfile, "wt") as outputfile:
+                outputfile.write("".join(line + "\n" for line in self.lines))
+
+    def execute(self, commands):
+
+        for command in commands:
+
+            if isinstance(command, tuple):
+                self.block(*command)
+                continue
+
+            name, args = command[0], command[1:]
+
+            if name == "load":
+                self.load(args)
+            elif name == "output-file":
+                self.outputfile = os.path.join(self.directory, args[0])
+            elif name == "compare-to":
+                self.comparefile = os.path.join(self.directory, args[0])
+            elif name == "output-list":
+                self.columns = list(map(parse_column, args))
+                self.lines.append(self.header())
+            elif name == "set":
+                self.set(args[0], parse_value(args[1]))
+            elif name == "ticktock":
+                self.ticktock(1)
+            elif name == "output":
+                self.lines.append(self.output())
+            elif name in ("echo", "clear-echo", "breakpoint", "clear-breakpoints"):
+                pass
+            else:
+                raise TestScriptError("%s is not a CPU emulator command" % name)
+
+    def block(self, words, commands):
+
+        if words[:1] != ["repeat"]:
+            raise TestScriptError("%s is not a CPU emulator command" % " ".join(words))
+
+        if len(words) < 2:
+            raise TestScriptError("repeat without a count never ends")
+
+        count = int(words[1])
+
+        if commands == [["ticktock"]]:
+            self.ticktock(count)
+        else:
+            for i in range(count):
+                self.execute(commands)
+
+    def load(self, args):
+
+        if not args:
+            raise TestScriptError("load of a directory is a VM emulator command")
+
+        filename = os.path.join(self.directory, args[0])
+        base, ext = os.path.splitext(filename)
+
+        if ext not in (".hack", ".asm"):
+            raise TestScriptError("%s is not a program for the CPU emulator" % args[0])
+
+        # the CPU emulator loads either, use whichever is there
+
+        if not os.path.exists(filename):
+            filename = base + (".asm" if ext == ".hack" else ".hack")
+
+        rom, symbols = Jarvis.read_program(filename)
+        rom = Jarvis.decode(list(rom.words) + [0] * (romSize - len(rom)))
+
+        self.cpu = Jarvis.CPU(rom, jit=self.jit)
+        self.halts = Jarvis.find_halts(rom)
+
+    def set(self, variable, value):
+
+        cpu = self.loaded()
+        match = variablePattern.match(variable)
+
+        if match:
+            cpu.RAM[int(match.group(1))] = (value + 32768 & 65535) - 32768
+        elif variable == "PC":
+            cpu.PC = value
+        elif variable == "A":
+            cpu.A = value
+        elif variable == "D":
+            cpu.D = value
+        else:
+            raise TestScriptError("unknown variable %s" % variable)
+
+    def get(self, variable):
+
+        cpu = self.loaded()
+        match = variablePattern.match(variable)
+
+        if match:
+            return cpu.RAM[int(match.group(1))]
+        elif variable in ("PC", "A", "D"):
+            return getattr(cpu, variable)
+        elif variable == "time":
+            return self.time()
+        else:
+            raise TestScriptError("unknown variable %s" % variable)
+
+    def ticktock(self, count):
+
+        cpu = self.loaded()
+        left = count - cpu.run(max_cycles=count, until_pc=self.halts).cycles
+
+        if left:
+
+            # the rest alternates between @END and 0;JMP
+
+            pc = cpu.PC
+            cpu.A = pc
+            cpu.PC = pc + (left & 1)
+            cpu.iterations += left
+
+            if left > 1:
+                cpu.zr, cpu.ng = 1, 0
+
+    def header(self):
+
+        cells = []
+
+        for name, kind, left, width, right in self.columns:
+            size = left + width + right
+            name = name[:size]
+            space = (size - len(name)) // 2
+            cells.append(" " * space + name + " " * (size - space - len(name)))
+
+        return "|" + "|".join(cells) + "|"
+
+    def output(self):
+
+        cells = []
+
+        for name, kind, left, width, right in self.columns:
+            cells.append(" " * left + format_value(self.get(name), kind, width) + " " * right)
+
+        return "|" + "|".join(cells) + "|"
+
+
+def find_scripts(paths):
+    """Returns => sorted list of the .tst files in paths (files or
+    directories, searched recursively)"""
+
+    scripts = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                scripts.extend(os.path.join(dirpath, name) for name in filenames if name.endswith(".tst"))
+        else:
+            scripts.append(path)
+
+    return sorted(scripts)
+
+def run_script(filename, jit=True):
+    """Returns => TestResult, an error one for a script that does not parse"""
+
+    try:
+        script = TestScript(filename, jit)
+    except Exception as e:
+        return TestResult(os.path.relpath(filename), "error", 0, 0, "%s: %s" % (type(e).__name__, e))
+
+    return script.run()
+
+def run_scripts(filenames, processes=None, jit=True):
+    """Runs scripts in a pool of processes, one per core by default.
+
+    Returns => list of TestResult in the order of filenames"""
+
+    with ProcessPoolExecutor(processes) as pool:
+        return list(pool.map(run_script, filenames, [jit] * len(filenames)))
+
+
+if __name__ == "__main__":
+
+    started = time.time()
+    results = run_scripts(find_scripts(sys.argv[1:] or ["."]))
+
+    for result in results:
+        print("%-5s %8.3fs %12i  %s" % (result.status, result.seconds, result.cycles, result.name))
+        if result.message:
+            print("      " + result.message.replace("\n", "\n      "))
+
+    counts = dict((status, sum(result.status == status for result in results)) for status in ("pass", "fail", "done", "error"))
+
+    print("%(pass)i passed, %(fail)i failed, %(done)i without compare file, %(error)i errors" % counts, end=" ")
+    print("in %.3fs" % (time.time() - started))
+
+    sys.exit(1 if counts["fail"] or counts["error"] else 0)
@@ -0,0 +1,111 @@
+"""Decodes a trace written by a Jarvis CPU in trace mode (see
+CPU.trace()) back to instructions, with the labels of the program.
+
+    cpu.trace(length=4000000, filename="crash.trace")
+    cpu.run(until_pc=Jarvis.find_halts(rom))
+
+Each line shows the cycle, the address, the nearest label before it,
+the instruction, then A and D after it ran and any RAM word it wrote:
+
+      12345678  17045 Math.multiply+12    D=D+M     A=    257 D=      3  RAM[257] = 3
+
+Usage: python3 Trace.py [-n count] trace program
+"""
+
+import sys, bisect, argparse
+
+import Jarvis
+
+def format_instruction(rom, pc):
+    """Disassembles the instruction at pc
+
+    >>> rom = Jarvis.decode([16, 0xFC10, 0xE309])
+    >>> [format_instruction(rom, pc) for pc in range(3)]
+    ['@16', 'D=M', 'M=D;JGT']
+
+    Returns => string"""
+
+    command = rom[pc]
+
+    if command["TYPE"] == "A_COMMAND":
+        return "@%i" % command["VAL"]
+
+    val = command["VAL"]
+
+    # disassemble() gives the comp of the A form
+
+    comp = val["COMP"].replace("A", "M") if rom.abit[pc] else val["COMP"]
+
+    return (val["DEST"] + "=" if val["DEST"] else "") + comp + (";" + val["JUMP"] if val["JUMP"] else "")
+
+class Labels:
+    """Finds the label an address is in: the nearest one at or before
+    it, of the labels in symbols (see Jarvis.make_symboltable)."""
+
+    def __init__(self, symbols):
+
+        predefined = Jarvis.make_symboltable([])
+        starts = {}
+
+        for name in sorted(symbols, key=len):
+            if name not in predefined:
+                starts.setdefault(symbols[name], name)
+
+        self.addresses = sorted(starts)
+        self.names = [starts[address] for address in self.addresses]
+
+    def find(self, pc):
+        """Returns => "label+offset", or the address if no label comes
+        before it"""
+
+        i = bisect.bisect_right(self.addresses, pc) - 1
+
+        if i < 0:
+            return str(pc)
+
+        offset = pc - self.addresses[i]
+
+        return self.names[i] + ("+%i" % offset if offset else "")
+
+def format_record(rom, labels, cycle, record):
+    """Returns => a line for one record of a trace"""
+
+    pc, A, D, address, value = record
+
+    line = "%12i %6i %-32s %-10s A=%7i D=%7i" % (cycle, pc, labels.find(pc), format_instruction(rom, pc), A, D)
+
+    if address != Jarvis.noWrite:
+        line += "  RAM[%i] = %i" % (address, value)
+
+    return line
+
+def decode_trace(filename, rom, symbols, count=None):
+    """Decodes the last count records of a trace (all by default).
+
+    Returns => iterator of lines"""
+
+    cycle, records = Jarvis.read_trace(filename)
+    labels = Labels(symbols)
+
+    first = 0 if count is None else max(0, len(records) - count)
+
+    for i in range(first, len(records)):
+        yield format_record(rom, labels, cycle + i, records[i])
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Decode a trace of a Jarvis CPU.")
+    parser.add_argument("trace", help="file written by CPU.trace()")
+    parser.add_argument("program", help="the .asm or .hack file that was traced")
+    parser.add_argument("-n", "--count", type=int, help="only the last count instructions")
+
+    args = parser.parse_args()
+
+    rom, symbols = Jarvis.read_program(args.program)
+
+    try:
+        for line in decode_trace(args.trace, rom, symbols, args.count):
+            print(line)
+    except BrokenPipeError:
+        sys.exit(0)